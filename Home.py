@@ -1,8 +1,15 @@
 # Home.py
 import streamlit as st
 import requests
-import re
-from docx_generator import create_single_docx_report
+from backend_client import get_backend_client
+from image_processing import IMAGE_PRESETS, DEFAULT_PRESET
+from report_export import render_export, lazy_builder
+from report_settings import PDF_MIME
+from url_utils import canonicalize_url
+from result_cache import get_result_cache, format_age
+from optimize_prefetch import start_optimize
+from perf import span, count
+from perf_panel import init_perf, render_perf_panel
 
 # --- CONFIGURAÇÃO DA PÁGINA E INTERFACE ---
 st.set_page_config(
@@ -10,19 +17,23 @@ st.set_page_config(
     page_icon="🚀",
     layout="wide"
 )
+init_perf()
 st.title("🚀 GlobalD IA Compliance para Amazon")
 st.markdown("Uma ferramenta de IA para **Analisar Inconsistências** e **Otimizar Listings** de produtos.")
 
-# URLs DA API
-BACKEND_BASE_URL = "https://globald.onrender.com"
-ANALYZE_URL = f"{BACKEND_BASE_URL}/analyze"
-OPTIMIZE_URL = f"{BACKEND_BASE_URL}/optimize"
+# CLIENTE DA API (URL configurável por GLOBALD_BACKEND_URL)
+backend = get_backend_client()
 
 # ESTADO DA SESSÃO
 if 'product_info' not in st.session_state: st.session_state.product_info = None
 if 'analysis_report' not in st.session_state: st.session_state.analysis_report = None
 if 'optimization_report' not in st.session_state: st.session_state.optimization_report = None
 if 'url_input' not in st.session_state: st.session_state.url_input = ""
+if 'analysis_cached_at' not in st.session_state: st.session_state.analysis_cached_at = None
+if 'optimization_cached_at' not in st.session_state: st.session_state.optimization_cached_at = None
+if 'optimize_future' not in st.session_state: st.session_state.optimize_future = None
+
+result_cache = get_result_cache()
 
 # --- FORMULÁRIO NA BARRA LATERAL ---
 with st.sidebar:
@@ -34,12 +45,19 @@ with st.sidebar:
             submitted = st.form_submit_button("Buscar", type="primary", use_container_width=True)
         with col2:
             cleared = st.form_submit_button("Limpar", use_container_width=True)
+        force_refresh = st.checkbox("Forçar atualização (ignorar cache)", key="force_refresh")
+    st.toggle(
+        "⚡ Pré-gerar listing otimizado após a análise",
+        key="prefetch_optimize",
+        help="Assim que a análise termina, a otimização começa em segundo plano."
+    )
 
 # LÓGICA PRINCIPAL
 if cleared:
     st.session_state.product_info = None
     st.session_state.analysis_report = None
     st.session_state.optimization_report = None
+    st.session_state.optimize_future = None
     st.session_state.url_input = ""
 
 if submitted and not amazon_url:
@@ -49,30 +67,70 @@ if submitted and amazon_url:
     st.session_state.product_info = None
     st.session_state.analysis_report = None
     st.session_state.optimization_report = None
+    st.session_state.analysis_cached_at = None
+    st.session_state.optimization_cached_at = None
+    st.session_state.optimize_future = None
     
-    with st.spinner("Buscando informações básicas do produto... 🤖"):
-        try:
-            sanitized_url = amazon_url.strip()
-            if not sanitized_url.startswith(('http://', 'https://')):
-                sanitized_url = 'https://' + sanitized_url
-
-            payload = {"amazon_url": sanitized_url}
-            response = requests.post(ANALYZE_URL, json=payload, timeout=120)
-            response.raise_for_status()
-            
-            st.session_state.product_info = response.json()
-            st.session_state.analysis_report = st.session_state.product_info.get('report')
-
-        except requests.exceptions.HTTPError as e:
+    sanitized_url = canonicalize_url(amazon_url)
+    cached = None if force_refresh else result_cache.get("analyze", sanitized_url)
+    if cached:
+        st.session_state.product_info, st.session_state.analysis_cached_at = cached
+        st.session_state.analysis_report = st.session_state.product_info.get('report')
+        count("result_cache.hits")
+    else:
+        with st.spinner("Buscando informações básicas do produto... 🤖"):
             try:
-                error_details = e.response.json().get("detail", "Erro desconhecido do servidor.")
-            except requests.exceptions.JSONDecodeError:
-                error_details = e.response.text
-            st.error(f"Ocorreu um erro na API ao buscar o produto: {error_details}")
-            st.session_state.product_info = None
-        except requests.exceptions.RequestException as e:
-            st.error(f"Erro de conexão com o backend: {e}")
-            st.session_state.product_info = None
+                st.session_state.product_info = backend.analyze(sanitized_url)
+                st.session_state.analysis_report = st.session_state.product_info.get('report')
+                result_cache.put("analyze", sanitized_url, st.session_state.product_info)
+
+            except requests.exceptions.HTTPError as e:
+                try:
+                    error_details = e.response.json().get("detail", "Erro desconhecido do servidor.")
+                except requests.exceptions.JSONDecodeError:
+                    error_details = e.response.text
+                st.error(f"Ocorreu um erro na API ao buscar o produto: {error_details}")
+                st.session_state.product_info = None
+            except requests.exceptions.RequestException as e:
+                st.error(f"Erro de conexão com o backend: {e}")
+                st.session_state.product_info = None
+
+    # Modo opcional: a otimização começa em segundo plano logo após a análise
+    if st.session_state.product_info and st.session_state.prefetch_optimize:
+        cached_optimization = None if force_refresh else result_cache.get("optimize", sanitized_url)
+        if cached_optimization:
+            st.session_state.optimization_report, st.session_state.optimization_cached_at = cached_optimization
+        else:
+            st.session_state.optimize_future = start_optimize(sanitized_url)
+
+
+def consume_optimize_future(future):
+    """Copia o resultado da otimização (em segundo plano) para a sessão, exibindo erros da API."""
+    st.session_state.optimize_future = None
+    try:
+        with span("optimize.wait", already_done=future.done()):
+            st.session_state.optimization_report = future.result()
+        st.session_state.optimization_cached_at = None
+    except requests.exceptions.HTTPError as e:
+        try:
+            error_details = e.response.json().get("detail", "Erro desconhecido do servidor.")
+        except requests.exceptions.JSONDecodeError:
+            error_details = e.response.text
+        st.error(f"Ocorreu um erro na API durante a otimização: {error_details}")
+    except requests.exceptions.RequestException as e:
+        st.error(f"Erro de conexão com o backend: {e}")
+
+
+@st.fragment(run_every=2)
+def optimize_prefetch_status():
+    """Acompanha a otimização em segundo plano e recarrega a página quando ela termina."""
+    future = st.session_state.optimize_future
+    if future is None:
+        return
+    if future.done():
+        st.rerun()
+    st.info("⏳ O listing otimizado já está sendo gerado em segundo plano e aparecerá aqui automaticamente.")
+
 
 # EXIBIÇÃO DOS RESULTADOS
 if st.session_state.product_info:
@@ -86,6 +144,8 @@ if st.session_state.product_info:
     with col2:
         st.subheader(info.get("product_title", "Título não encontrado"))
         st.info(f"**ASIN:** `{info.get('asin', 'N/A')}` | **Mercado:** `{info.get('country', 'N/A')}`")
+        if st.session_state.analysis_cached_at:
+            st.caption(f"🗄️ Resultado do cache ({format_age(st.session_state.analysis_cached_at)}). Marque \"Forçar atualização\" para analisar novamente.")
 
     st.markdown("---")
     tab1, tab2 = st.tabs(["📊 Análise de Inconsistências", "✨ Otimização de Listing (SEO)"])
@@ -111,45 +171,69 @@ if st.session_state.product_info:
         st.divider()
         st.subheader("Download do Relatório")
         
-        # O botão de download agora usa a função de DOCX corrigida
-        docx_file = create_single_docx_report(info, st.session_state.url_input)
-        st.download_button(
-            label="📄 Baixar Relatório em Word (.docx)",
-            data=docx_file,
-            file_name=f"relatorio_analise_{info.get('asin', 'produto')}.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+        image_preset = st.selectbox(
+            "Qualidade das imagens no relatório",
+            list(IMAGE_PRESETS),
+            index=list(IMAGE_PRESETS).index(DEFAULT_PRESET),
+            key="single_image_preset"
         )
+        # Os arquivos só são gerados quando solicitados e ficam memorizados enquanto o resultado não mudar
+        export_args = (info, st.session_state.url_input, image_preset)
+        col_docx, col_pdf = st.columns(2)
+        with col_docx:
+            render_export(
+                "single_docx",
+                lazy_builder("docx_generator", "create_single_docx_report"),
+                export_args,
+                label="Relatório em Word (.docx)",
+                file_name=f"relatorio_analise_{info.get('asin', 'produto')}.docx"
+            )
+        with col_pdf:
+            render_export(
+                "single_pdf",
+                lazy_builder("pdf_generator", "create_single_pdf_report"),
+                export_args,
+                label="Relatório em PDF (.pdf)",
+                file_name=f"relatorio_analise_{info.get('asin', 'produto')}.pdf",
+                mime=PDF_MIME
+            )
         
     with tab2:
         st.header("Otimização Completa do Listing para Máxima Performance")
         st.markdown("Gere um listing completo (título, pontos, descrição, etc.) otimizado para os algoritmos da Amazon e para conversão de vendas, com base em reviews de clientes e dados de concorrentes.")
         
-        if st.button("Gerar Listing Otimizado com IA", key="optimize_btn", use_container_width=True):
+        optimize_clicked = st.button("Gerar Listing Otimizado com IA", key="optimize_btn", use_container_width=True)
+        sanitized_url = canonicalize_url(st.session_state.url_input)
+        future = st.session_state.optimize_future
+        cached = None
+        if optimize_clicked and not st.session_state.force_refresh:
+            cached = result_cache.get("optimize", sanitized_url)
+        if cached:
+            st.session_state.optimization_report, st.session_state.optimization_cached_at = cached
+            st.session_state.optimize_future = None
+        elif optimize_clicked or (future is not None and future.done()):
+            # Um clique durante a pré-geração aguarda a mesma requisição em vez de abrir outra
+            if future is None:
+                future = start_optimize(sanitized_url)
             with st.spinner("A IA está buscando reviews, analisando concorrentes e criando seu listing otimizado... Isso pode levar um minuto. 🧠"):
-                try:
-                    sanitized_url = st.session_state.url_input.strip()
-                    if not sanitized_url.startswith(('http://', 'https://')):
-                        sanitized_url = 'https://' + sanitized_url
-                        
-                    payload = {"amazon_url": sanitized_url}
-                    response = requests.post(OPTIMIZE_URL, json=payload, timeout=180)
-                    response.raise_for_status()
-                    
-                    st.session_state.optimization_report = response.json().get('optimized_listing_report')
-                except requests.exceptions.HTTPError as e:
-                    try:
-                        error_details = e.response.json().get("detail", "Erro desconhecido do servidor.")
-                    except requests.exceptions.JSONDecodeError:
-                        error_details = e.response.text
-                    st.error(f"Ocorreu um erro na API durante a otimização: {error_details}")
-                except requests.exceptions.RequestException as e:
-                    st.error(f"Erro de conexão com o backend: {e}")
+                consume_optimize_future(future)
+        elif future is not None:
+            optimize_prefetch_status()
 
         if st.session_state.optimization_report:
             st.markdown("---")
             st.subheader("📈 Seu Novo Listing Otimizado:")
+            if st.session_state.optimization_cached_at:
+                st.caption(f"🗄️ Resultado do cache ({format_age(st.session_state.optimization_cached_at)}).")
 
             st.markdown(st.session_state.optimization_report)
 
+            render_export(
+                "listing_docx",
+                lazy_builder("docx_generator", "create_listing_docx_report"),
+                (st.session_state.optimization_report, st.session_state.url_input, info.get('product_title')),
+                label="Listing Otimizado em Word (.docx)",
+                file_name=f"listing_otimizado_{info.get('asin', 'produto')}.docx"
+            )
 
-
+render_perf_panel()
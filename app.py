@@ -1 +1,12 @@
+# app.py
+import streamlit as st
 
+# Ponto de entrada da aplicação (`streamlit run app.py`). Cada página é um script
+# próprio e importa apenas o que usa; os geradores de relatório (python-docx, fpdf2)
+# e o pandas só são carregados quando o usuário exporta ou exibe tabelas.
+pages = [
+    st.Page("Home.py", title="Análise de Produto", icon="🚀", default=True),
+    st.Page("pages/batch_analysis.py", title="Análise em Lote", icon="📦", url_path="batch_analysis"),
+]
+
+st.navigation(pages).run()
@@ -0,0 +1,161 @@
+# backend_client.py
+import email.utils
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from perf import span
+
+# URL do backend (pode ser trocada por ambiente, ex.: para testes locais)
+BACKEND_BASE_URL = os.environ.get('GLOBALD_BACKEND_URL', 'https://globald.onrender.com').rstrip('/')
+
+# Timeouts por endpoint (segundos)
+ANALYZE_TIMEOUT = 120
+OPTIMIZE_TIMEOUT = 180
+BATCH_TIMEOUT = 300
+# Imagens têm prazo curto e nenhuma nova tentativa: uma imagem que falha não deve segurar o relatório
+IMAGE_TIMEOUT = 10
+
+# Política de novas tentativas para erros transitórios
+MAX_RETRIES = int(os.environ.get('GLOBALD_BACKEND_RETRIES', '3'))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRY_AFTER_MAX = 120.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+POOL_SIZE = 32
+LATENCY_WINDOW = 200
+
+
+def _retry_after_seconds(response):
+    """Lê o cabeçalho Retry-After (em segundos ou como data HTTP)."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class BackendClient:
+    """
+    Cliente único para o backend e para o download de imagens: usa uma sessão
+    HTTP com pool de conexões keep-alive, repete requisições que falham com
+    429/5xx ou erro de conexão (backoff exponencial com jitter, respeitando
+    Retry-After) e guarda estatísticas de latência por endpoint.
+    """
+
+    def __init__(self, base_url: str = BACKEND_BASE_URL, max_retries: int = MAX_RETRIES, pool_size: int = POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._stats_lock = threading.Lock()
+        self._latencies = {}
+        self._counters = {}
+
+    def _record(self, endpoint: str, elapsed: float, failed: bool, retries: int):
+        with self._stats_lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+            counters = self._counters.setdefault(endpoint, {'requests': 0, 'errors': 0, 'retries': 0})
+            counters['requests'] += 1
+            counters['errors'] += int(failed)
+            counters['retries'] += retries
+
+    def backoff(self, attempt: int, response=None) -> float:
+        """Espera antes da nova tentativa `attempt` (0 = primeira): Retry-After ou exponencial com jitter."""
+        if response is not None:
+            retry_after = _retry_after_seconds(response)
+            if retry_after is not None:
+                return min(retry_after, RETRY_AFTER_MAX)
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def request(self, method: str, url: str, endpoint: str, timeout: float, max_retries: int = None, **kwargs):
+        """
+        Executa a requisição com a política de novas tentativas e retorna a resposta.
+        `max_retries` substitui o limite do cliente (0 quando quem chama cuida das
+        novas tentativas). Erros HTTP definitivos são levantados como requests.exceptions.HTTPError.
+        """
+        max_retries = self.max_retries if max_retries is None else max_retries
+        start = time.perf_counter()
+        attempt = 0
+        failed = True
+        with span("backend.request", endpoint=endpoint) as s:
+            try:
+                while True:
+                    try:
+                        response = self.session.request(method, url, timeout=timeout, **kwargs)
+                    except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                        if attempt >= max_retries:
+                            raise
+                        time.sleep(self.backoff(attempt))
+                        attempt += 1
+                        continue
+                    if response.status_code in RETRY_STATUS and attempt < max_retries:
+                        delay = self.backoff(attempt, response)
+                        response.close()
+                        time.sleep(delay)
+                        attempt += 1
+                        continue
+                    s.set(status=response.status_code, retries=attempt)
+                    response.raise_for_status()
+                    failed = False
+                    return response
+            finally:
+                self._record(endpoint, time.perf_counter() - start, failed, attempt)
+
+    def post(self, path: str, payload: dict, timeout: float, max_retries: int = None):
+        return self.request('POST', f"{self.base_url}{path}", path, timeout, max_retries, json=payload)
+
+    def analyze(self, amazon_url: str) -> dict:
+        return self.post('/analyze', {"amazon_url": amazon_url}, ANALYZE_TIMEOUT).json()
+
+    def optimize(self, amazon_url: str) -> dict:
+        return self.post('/optimize', {"amazon_url": amazon_url}, OPTIMIZE_TIMEOUT).json()
+
+    def batch_analyze(self, amazon_urls: list, timeout: float = BATCH_TIMEOUT, max_retries: int = None) -> list:
+        return self.post('/batch_analyze', {"amazon_urls": amazon_urls}, timeout, max_retries).json().get('results', [])
+
+    def get_image(self, url: str) -> bytes:
+        return self.request('GET', url, 'image', IMAGE_TIMEOUT, max_retries=0).content
+
+    def latency_stats(self) -> dict:
+        """Retorna, por endpoint, contadores e latências (média, p50, p95, máx.) em segundos."""
+        with self._stats_lock:
+            snapshot = {endpoint: sorted(values) for endpoint, values in self._latencies.items()}
+            counters = {endpoint: dict(values) for endpoint, values in self._counters.items()}
+        stats = {}
+        for endpoint, values in snapshot.items():
+            stats[endpoint] = {
+                **counters[endpoint],
+                'mean': sum(values) / len(values),
+                'p50': values[len(values) // 2],
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max': values[-1],
+            }
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_backend_client() -> BackendClient:
+    """Retorna o cliente compartilhado pelo processo (uma única sessão com pool)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BackendClient()
+        return _client
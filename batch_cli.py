@@ -0,0 +1,290 @@
+# batch_cli.py
+"""
+Análise em lote pela linha de comando, sem o Streamlit (ex.: varreduras agendadas
+no cron). Usa a mesma validação de URLs, o mesmo envio em blocos ao /batch_analyze
+e o mesmo gerador de DOCX da página de Análise em Lote.
+
+As URLs são lidas aos poucos de um arquivo (.txt, .csv ou .xlsx) ou da entrada
+padrão, e cada resultado é gravado no arquivo JSONL assim que chega, uma linha por
+produto: {"position": ..., "url": ..., "result": {...}}. Ao final, o relatório
+consolidado é exportado em DOCX a partir do JSONL.
+
+Uso:
+    python batch_cli.py urls.txt --output resultados.jsonl --docx-dir relatorios/
+    cat urls.txt | python batch_cli.py - --max-in-flight 5 --workers 4
+    python batch_cli.py urls.csv --output resultados.jsonl --resume --no-docx
+
+Códigos de saída: 0 sem falhas, 1 se alguma URL falhou ou nenhuma URL válida foi
+encontrada, 2 para argumentos inválidos.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+from batch_scheduler import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_MAX_IN_FLIGHT, DEFAULT_RETRIES, CHUNK_TIMEOUT,
+    error_result, iter_batch_results
+)
+from image_processing import IMAGE_PRESETS, DEFAULT_PRESET
+from perf import span
+from report_settings import BATCH_VOLUME_MAX_PRODUCTS, BATCH_VOLUME_MAX_MB
+from result_cache import get_result_cache
+from url_ingest import iter_upload_rows, iter_validated_rows
+from url_utils import product_key
+
+DEFAULT_OUTPUT = "resultados_analise.jsonl"
+DEFAULT_BASE_NAME = "relatorio_consolidado_analise"
+INPUT_EXTENSIONS = ('.txt', '.csv', '.xlsx')
+
+
+class BatchStats:
+    """Contadores da execução, para o progresso e o resumo final."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.rows = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.resumed = 0
+        self.cached = 0
+        self.submitted = 0
+        self.done = 0
+        self.failed = 0
+        self.failed_chunks = 0
+        self.retried_chunks = 0
+        self.last_error = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def urls_per_min(self) -> float:
+        # Só as URLs enviadas ao backend contam para a vazão
+        return self.done / self.elapsed * 60 if self.elapsed > 0 else 0.0
+
+    def summary_lines(self) -> list:
+        lines = [
+            f"Linhas lidas: {self.rows} ({self.invalid} inválidas, {self.duplicates} duplicadas)",
+            f"Produtos: {self.submitted} enviados, {self.cached} do cache, {self.resumed} já presentes no JSONL",
+            f"Analisados: {self.done} em {self.elapsed:.1f} s ({self.urls_per_min:.1f} URLs/min)",
+            f"Falhas: {self.failed} URL(s), {self.failed_chunks} bloco(s) perdidos, {self.retried_chunks} bloco(s) reenviados",
+        ]
+        if self.last_error:
+            lines.append(f"Último erro: {self.last_error}")
+        return lines
+
+
+def _log(message: str):
+    print(message, file=sys.stderr, flush=True)
+
+
+def _read_rows(source: str, input_format: str):
+    """(linha, valor) do arquivo ou, com '-', da entrada padrão (texto, uma URL por linha)."""
+    if source == '-':
+        yield from iter_upload_rows(sys.stdin.buffer, f"stdin.{input_format}")
+        return
+    with open(source, 'rb') as file_obj:
+        yield from iter_upload_rows(file_obj, source)
+
+
+def load_jsonl_results(path: str) -> dict:
+    """
+    Lê um JSONL gravado por este comando e retorna {posição: (url, resultado)}.
+    Se a mesma posição aparecer mais de uma vez (execução retomada), vale a última.
+    Uma linha final incompleta (execução interrompida) é ignorada.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['position']] = (record['url'], record['result'])
+    return records
+
+
+def _iter_product_urls(rows, stats: BatchStats, skip_keys: set):
+    """
+    Produz (posição, URL canônica) dos produtos únicos, na ordem de entrada. A posição
+    conta também os produtos pulados, para continuar estável ao retomar o mesmo arquivo.
+    """
+    seen = set()
+    position = 0
+    for line_number, value, url in iter_validated_rows(rows):
+        stats.rows += 1
+        if url is None:
+            stats.invalid += 1
+            _log(f"Linha {line_number} ignorada (não é uma URL de produto da Amazon): {value}")
+            continue
+        key = product_key(url)
+        if key in seen:
+            stats.duplicates += 1
+            continue
+        seen.add(key)
+        if key in skip_keys:
+            stats.resumed += 1
+        else:
+            yield position, url
+        position += 1
+
+
+def run_batch(rows, output, stats: BatchStats, chunk_size: int = DEFAULT_CHUNK_SIZE,
+              max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, retries: int = DEFAULT_RETRIES,
+              timeout: float = CHUNK_TIMEOUT, skip_keys: set = frozenset(), use_cache: bool = True,
+              progress_every: int = 100):
+    """
+    Envia as URLs de `rows` ao backend em blocos e grava cada resultado em `output`
+    (arquivo texto aberto) assim que o bloco termina. Produtos em `skip_keys` não são
+    reenviados. Com `use_cache`, produtos analisados recentemente vêm do cache de resultados.
+    """
+    result_cache = get_result_cache()
+    # Bloco -> posições dos seus produtos; removido quando o bloco termina
+    chunk_positions = {}
+    chunk_numbers = itertools.count()
+    pending_positions = []
+    chunk_size = max(1, int(chunk_size))
+
+    def write(position: int, url: str, result: dict):
+        output.write(json.dumps({'position': position, 'url': url, 'result': result}, ensure_ascii=False) + "\n")
+        if result.get('error'):
+            stats.failed += 1
+            stats.last_error = result['error']
+
+    def pending_urls():
+        for position, url in _iter_product_urls(rows, stats, skip_keys):
+            cached = result_cache.get("analyze", url) if use_cache else None
+            if cached:
+                stats.cached += 1
+                write(position, url, cached[0])
+                continue
+            stats.submitted += 1
+            pending_positions.append(position)
+            if len(pending_positions) == chunk_size:
+                chunk_positions[next(chunk_numbers)] = pending_positions[:]
+                pending_positions.clear()
+            yield url
+        if pending_positions:
+            chunk_positions[next(chunk_numbers)] = pending_positions[:]
+
+    next_report = progress_every
+    with span("batch.submit", chunk_size=chunk_size, in_flight=max_in_flight) as s:
+        for chunk in iter_batch_results(pending_urls(), chunk_size, max_in_flight, retries, timeout):
+            positions = chunk_positions.pop(chunk.index)
+            if chunk.attempts > 1:
+                stats.retried_chunks += 1
+            if chunk.results is None:
+                stats.failed_chunks += 1
+                results = [error_result(chunk.error) for _ in chunk.urls]
+            else:
+                # Mantém o alinhamento com as URLs caso a API devolva menos resultados
+                missing = len(chunk.urls) - len(chunk.results)
+                results = list(chunk.results) + [error_result("resultado ausente na resposta da API")] * missing
+            for position, url, result in zip(positions, chunk.urls, results):
+                write(position, url, result)
+                if chunk.results is not None and not result.get('error'):
+                    result_cache.put("analyze", url, result)
+            output.flush()
+            stats.done += len(chunk.urls)
+            if progress_every and stats.done >= next_report:
+                next_report = stats.done + progress_every
+                _log(f"{stats.done} URLs analisadas · {stats.urls_per_min:.1f} URLs/min · {stats.failed} falha(s)")
+        s.set(urls=stats.submitted, failed_chunks=stats.failed_chunks)
+
+
+def export_docx(jsonl_path: str, output_dir: str, image_preset: str, max_products: int,
+                max_mb: float, base_name: str, workers: int = None):
+    """Exporta o relatório consolidado a partir do JSONL, na ordem de entrada das URLs."""
+    from docx_generator import create_batch_docx_export
+
+    records = load_jsonl_results(jsonl_path)
+    if not records:
+        return None
+    ordered = [records[position] for position in sorted(records)]
+    os.makedirs(output_dir, exist_ok=True)
+    path, _, _ = create_batch_docx_export(
+        [result for _, result in ordered], [url for url, _ in ordered], image_preset,
+        max_products, max_mb, output_dir=output_dir, base_name=base_name, workers=workers
+    )
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Análise em lote de produtos da Amazon pela linha de comando.")
+    parser.add_argument('input', help="Arquivo .txt, .csv ou .xlsx com as URLs (primeira coluna), ou '-' para a entrada padrão")
+    parser.add_argument('--input-format', choices=['txt', 'csv'], default='txt', help="Formato da entrada padrão")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Arquivo JSONL de resultados")
+    parser.add_argument('--resume', action='store_true',
+                        help="Mantém o JSONL existente e envia só os produtos ainda sem resultado válido")
+    parser.add_argument('--force-refresh', action='store_true', help="Ignora os resultados em cache")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="URLs por requisição")
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Requisições simultâneas")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help="Tentativas extras por bloco")
+    parser.add_argument('--timeout', type=float, default=CHUNK_TIMEOUT, help="Tempo limite por requisição (s)")
+    parser.add_argument('--progress-every', type=int, default=100, help="Intervalo (em URLs) das linhas de progresso; 0 desativa")
+    parser.add_argument('--no-docx', action='store_true', help="Não gera o relatório DOCX ao final")
+    parser.add_argument('--docx-dir', default='.', help="Pasta do relatório DOCX (ou .zip com vários volumes)")
+    parser.add_argument('--docx-name', default=DEFAULT_BASE_NAME, help="Nome base do arquivo do relatório")
+    parser.add_argument('--image-preset', choices=list(IMAGE_PRESETS), default=DEFAULT_PRESET)
+    parser.add_argument('--max-products', type=int, default=BATCH_VOLUME_MAX_PRODUCTS, help="Produtos por arquivo .docx")
+    parser.add_argument('--max-mb', type=float, default=BATCH_VOLUME_MAX_MB, help="Tamanho máximo (MB) por arquivo .docx")
+    parser.add_argument('--workers', type=int, help="Processos para desenhar o DOCX (padrão: GLOBALD_DOCX_WORKERS)")
+    args = parser.parse_args(argv)
+
+    if args.input != '-':
+        if not args.input.lower().endswith(INPUT_EXTENSIONS):
+            parser.error(f"formato de arquivo não suportado: {args.input} (use {', '.join(INPUT_EXTENSIONS)})")
+        if not os.path.exists(args.input):
+            parser.error(f"arquivo não encontrado: {args.input}")
+
+    skip_keys = set()
+    if args.resume:
+        skip_keys = {
+            product_key(url) for url, result in load_jsonl_results(args.output).values()
+            if not result.get('error')
+        }
+        if skip_keys:
+            _log(f"Retomando: {len(skip_keys)} produto(s) já analisados em {args.output}")
+
+    stats = BatchStats()
+    try:
+        with open(args.output, 'a' if args.resume else 'w', encoding='utf-8') as output:
+            run_batch(
+                _read_rows(args.input, args.input_format), output, stats,
+                args.chunk_size, args.max_in_flight, args.retries, args.timeout,
+                skip_keys, not args.force_refresh, args.progress_every
+            )
+    except KeyboardInterrupt:
+        _log(f"Interrompido. Os resultados recebidos estão em {args.output}; use --resume para continuar.")
+        for line in stats.summary_lines():
+            print(line)
+        return 1
+
+    for line in stats.summary_lines():
+        print(line)
+    print(f"Resultados: {args.output}")
+
+    if not args.no_docx:
+        start = time.perf_counter()
+        path = export_docx(
+            args.output, args.docx_dir, args.image_preset, args.max_products,
+            args.max_mb, args.docx_name, args.workers
+        )
+        if path:
+            print(f"Relatório: {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB em {time.perf_counter() - start:.1f} s)")
+
+    no_urls = stats.submitted + stats.cached + stats.resumed == 0
+    if no_urls:
+        _log("Nenhuma URL de produto válida encontrada na entrada.")
+    return 1 if stats.failed or no_urls else 0
+
+
+# A exportação do DOCX usa um pool de processos (spawn), que reimporta este módulo
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# batch_scheduler.py
+import itertools
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from backend_client import RETRY_STATUS, get_backend_client
+from perf import propagate
+
+# Parâmetros padrão do envio em lote
+DEFAULT_CHUNK_SIZE = 10
+DEFAULT_MAX_IN_FLIGHT = 3
+DEFAULT_RETRIES = 2
+CHUNK_TIMEOUT = 300
+
+# Resultado de um bloco de URLs: `results` é None quando todas as tentativas falharam
+ChunkResult = namedtuple('ChunkResult', ['index', 'urls', 'results', 'error', 'attempts'])
+
+
+def chunk_urls(urls: list, chunk_size: int) -> list:
+    """Divide a lista de URLs em blocos de até `chunk_size` itens."""
+    chunk_size = max(1, int(chunk_size))
+    return [urls[i:i + chunk_size] for i in range(0, len(urls), chunk_size)]
+
+
+def iter_chunks(urls, chunk_size: int):
+    """Como `chunk_urls`, mas consome qualquer iterável aos poucos, sem materializá-lo."""
+    chunk_size = max(1, int(chunk_size))
+    urls = iter(urls)
+    while True:
+        chunk = list(itertools.islice(urls, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _is_transient(error) -> bool:
+    """Falhas que podem passar ao reenviar: conexão, tempo esgotado e respostas 429/5xx."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in RETRY_STATUS
+    return isinstance(error, (
+        requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError
+    ))
+
+
+def _run_chunk(index: int, urls: list, timeout: float, retries: int) -> ChunkResult:
+    # As novas tentativas do bloco ficam só aqui: o cliente é chamado sem as próprias,
+    # para que uma falha não multiplique as requisições (e as esperas) das duas camadas
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            results = get_backend_client().batch_analyze(urls, timeout, max_retries=0)
+            return ChunkResult(index, urls, results, None, attempts)
+        except requests.exceptions.RequestException as e:
+            # Erros definitivos (ex.: 400, resposta inválida) não são reenviados
+            if attempts > retries or not _is_transient(e):
+                return ChunkResult(index, urls, None, e, attempts)
+            time.sleep(get_backend_client().backoff(attempts - 1, e.response))
+
+
+def iter_batch_results(urls, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, retries: int = DEFAULT_RETRIES,
+                       timeout: float = CHUNK_TIMEOUT):
+    """
+    Envia as URLs ao endpoint de lote em blocos, mantendo até `max_in_flight`
+    requisições simultâneas, e produz um ChunkResult para cada bloco à medida que
+    termina (fora de ordem; `index` é a posição do bloco). Cada bloco é repetido até
+    `retries` vezes em caso de falha. `urls` pode ser um iterável sem fim conhecido:
+    o próximo bloco só é lido quando há vaga, então a memória usada é limitada.
+    """
+    max_in_flight = max(1, int(max_in_flight))
+    chunks = enumerate(iter_chunks(urls, chunk_size))
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    run_chunk = propagate(_run_chunk)
+    in_flight = set()
+    try:
+        while True:
+            for i, chunk in itertools.islice(chunks, max_in_flight - len(in_flight)):
+                in_flight.add(executor.submit(run_chunk, i, chunk, timeout, retries))
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Se o consumidor parar no meio (ex.: rerun do Streamlit), não espera os blocos pendentes
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def error_result(error) -> dict:
+    """Resultado substituto para uma URL cujo bloco falhou, no mesmo formato da API."""
+    return {
+        'asin': 'N/A',
+        'product_title': 'Falha na análise',
+        'report': f"Não foi possível analisar este produto: {error}",
+        'product_photos': [],
+        'error': str(error),
+    }
+
@@ -0,0 +1,121 @@
+# benchmarks/check_startup.py
+"""
+Verifica o orçamento de inicialização da aplicação: tempo de importação dos
+módulos usados pelas páginas, tempo da primeira execução de cada página e a
+ausência de bibliotecas pesadas (python-docx, fpdf2, pandas...) antes de o
+usuário exportar algo. Cada medição roda em um interpretador novo. Sai com
+código 1 se algum limite for ultrapassado, para uso em CI.
+
+Uso:
+    python benchmarks/check_startup.py
+    python benchmarks/check_startup.py --import-budget 0.2 --render-budget 1.0 --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Módulos importados pelas páginas na carga (além do próprio Streamlit)
+APP_MODULES = [
+    'backend_client', 'batch_scheduler', 'checkpoint_store', 'image_processing',
+    'optimize_prefetch', 'perf', 'perf_panel', 'report_export', 'report_settings',
+    'result_cache', 'results_explorer', 'url_ingest', 'url_utils',
+]
+# Bibliotecas que só devem ser carregadas quando um relatório é gerado ou uma tabela é exibida
+HEAVY_MODULES = ['docx', 'fpdf', 'fontTools', 'pandas', 'openpyxl', 'PIL', 'lxml']
+PAGES = ['Home.py', 'pages/batch_analysis.py']
+# Limites padrão (s), também usados por tests/test_startup.py
+IMPORT_BUDGET_S = 0.3
+RENDER_BUDGET_S = 1.5
+
+
+def measure() -> dict:
+    """Executado no subprocesso: mede as importações e a primeira execução das páginas."""
+    start = time.perf_counter()
+    import streamlit  # noqa: F401
+    streamlit_s = time.perf_counter() - start
+
+    sys.path.insert(0, REPO_DIR)
+    start = time.perf_counter()
+    for module in APP_MODULES:
+        __import__(module)
+    app_import_s = time.perf_counter() - start
+    loaded_on_import = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    from streamlit.testing.v1 import AppTest
+    render_s = {}
+    app = AppTest.from_file(os.path.join(REPO_DIR, 'app.py'), default_timeout=60)
+    for page in PAGES:
+        start = time.perf_counter()
+        if page == PAGES[0]:
+            app.run()
+        else:
+            app.switch_page(page).run()
+        render_s[page] = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(f"{page}: {app.exception[0].message}")
+
+    return {
+        'streamlit_import_s': round(streamlit_s, 4),
+        'app_import_s': round(app_import_s, 4),
+        'render_s': {page: round(value, 4) for page, value in render_s.items()},
+        'heavy_loaded_on_import': loaded_on_import,
+        'heavy_loaded_after_render': [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+
+
+def _run_child() -> dict:
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child'],
+        cwd=REPO_DIR, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1:])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de inicialização das páginas.")
+    parser.add_argument('--runs', type=int, default=3, help="Execuções (é usada a mediana)")
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET_S,
+                        help="Tempo máximo (s) para importar os módulos das páginas, sem contar o Streamlit")
+    parser.add_argument('--render-budget', type=float, default=RENDER_BUDGET_S,
+                        help="Tempo máximo (s) da primeira execução de cada página")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure()))
+        return 0
+
+    runs = [_run_child() for _ in range(args.runs)]
+    report = {
+        'streamlit_import_s': statistics.median(r['streamlit_import_s'] for r in runs),
+        'app_import_s': statistics.median(r['app_import_s'] for r in runs),
+        'render_s': {page: statistics.median(r['render_s'][page] for r in runs) for page in PAGES},
+        'heavy_loaded_on_import': runs[-1]['heavy_loaded_on_import'],
+        'heavy_loaded_after_render': runs[-1]['heavy_loaded_after_render'],
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    failures = []
+    if report['app_import_s'] > args.import_budget:
+        failures.append(f"importação dos módulos: {report['app_import_s']} s > {args.import_budget} s")
+    for page, value in report['render_s'].items():
+        if value > args.render_budget:
+            failures.append(f"primeira execução de {page}: {value} s > {args.render_budget} s")
+    if report['heavy_loaded_after_render']:
+        failures.append(f"módulos pesados carregados na inicialização: {', '.join(report['heavy_loaded_after_render'])}")
+    for line in failures:
+        print(f"ORÇAMENTO EXCEDIDO: {line}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
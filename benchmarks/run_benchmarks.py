@@ -0,0 +1,214 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks offline da geração de relatórios e do envio em lote, usando o backend
+local de `stub_server.py`. Cada cenário roda em um subprocesso separado para que
+o pico de memória (RSS) medido seja só dele.
+
+Uso:
+    python benchmarks/run_benchmarks.py --sizes 10,100,1000 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline bench_anterior.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubConfig, analysis_payload, start_stub_server  # noqa: E402
+
+SCENARIOS = ['single_docx', 'batch_docx', 'batch_docx_parallel', 'batch_pdf', 'batch_submit']
+METRICS = ['wall_s', 'peak_rss_mb', 'peak_rss_children_mb']
+
+
+def _peak_rss_mb(who=resource.RUSAGE_SELF) -> float:
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _stop_worker_pools():
+    # Os processos do pool só entram em RUSAGE_CHILDREN depois de encerrados
+    docx_generator = sys.modules.get('docx_generator')
+    if docx_generator is not None:
+        docx_generator._discard_render_pool(wait=True)
+
+
+def _product_urls(size: int) -> list:
+    return [f"https://www.amazon.com.br/dp/B{i:09d}" for i in range(size)]
+
+
+def merge_chunk_results(chunk_results: dict) -> list:
+    """Junta os resultados dos blocos na ordem original das URLs (como a página faz pelo checkpoint)."""
+    from batch_scheduler import error_result
+    merged = []
+    for index in sorted(chunk_results):
+        chunk = chunk_results[index]
+        if chunk.results is None:
+            merged.extend(error_result(chunk.error) for _ in chunk.urls)
+        else:
+            merged.extend(chunk.results)
+            missing = len(chunk.urls) - len(chunk.results)
+            merged.extend(error_result("resultado ausente na resposta da API") for _ in range(missing))
+    return merged
+
+
+def run_scenario(name: str, size: int, base_url: str, images_per_product: int) -> dict:
+    """Executa um cenário no processo atual e retorna suas métricas."""
+    config = StubConfig(images_per_product=images_per_product)
+    config.base_url = base_url
+    urls = _product_urls(size)
+
+    if name == 'single_docx':
+        from docx_generator import create_single_docx_report
+        info = analysis_payload(config, urls[0])
+        start = time.perf_counter()
+        output = create_single_docx_report(info, urls[0])
+        output_bytes = len(output.getvalue())
+    elif name in ('batch_docx', 'batch_docx_parallel'):
+        from docx_generator import create_batch_docx_report, DOCX_WORKERS
+        results = [analysis_payload(config, url) for url in urls]
+        # batch_docx mede o caminho serial; batch_docx_parallel usa o pool de processos padrão
+        workers = 1 if name == 'batch_docx' else DOCX_WORKERS
+        start = time.perf_counter()
+        output = create_batch_docx_report(results, urls, workers=workers)
+        output_bytes = len(output.getvalue())
+    elif name == 'batch_pdf':
+        from pdf_generator import create_batch_pdf_export
+        results = [analysis_payload(config, url) for url in urls]
+        start = time.perf_counter()
+        path, _, _ = create_batch_pdf_export(results, urls)
+        output_bytes = os.path.getsize(path)
+    elif name == 'batch_submit':
+        from batch_scheduler import iter_batch_results
+        start = time.perf_counter()
+        chunks = {chunk.index: chunk for chunk in iter_batch_results(urls)}
+        output_bytes = len(json.dumps(merge_chunk_results(chunks)).encode('utf-8'))
+    else:
+        raise ValueError(f"Cenário desconhecido: {name}")
+
+    wall_s = time.perf_counter() - start
+    _stop_worker_pools()
+    return {
+        'scenario': name,
+        'size': size,
+        'wall_s': round(wall_s, 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        # Maior pico entre os processos filhos (ex.: cada processo do pool do DOCX)
+        'peak_rss_children_mb': round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        'output_bytes': output_bytes,
+    }
+
+
+def _run_in_subprocess(name: str, size: int, base_url: str, args) -> dict:
+    env = dict(os.environ)
+    env['GLOBALD_BACKEND_URL'] = base_url
+    # Sem caches persistentes: cada execução mede o caminho completo
+    env['GLOBALD_IMAGE_CACHE_MB'] = '0'
+    env['GLOBALD_RESULT_CACHE_DB'] = ''
+    cmd = [
+        sys.executable, os.path.abspath(__file__),
+        '--scenario', name, '--size', str(size),
+        '--base-url', base_url, '--images-per-product', str(args.images_per_product),
+    ]
+    completed = subprocess.run(cmd, env=env, cwd=REPO_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {'scenario': name, 'size': size, 'error': completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare_with_baseline(results: list, baseline: dict, tolerance: float) -> list:
+    """Lista os cenários em que alguma métrica piorou mais que `tolerance` em relação à base."""
+    previous = {(r['scenario'], r['size']): r for r in baseline.get('results', []) if 'error' not in r}
+    regressions = []
+    for result in results:
+        old = previous.get((result['scenario'], result['size']))
+        if old is None or 'error' in result:
+            continue
+        for metric in METRICS:
+            if old.get(metric) and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{result['scenario']}[{result['size']}] {metric}: {old[metric]} -> {result[metric]}"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline dos relatórios e do envio em lote.")
+    parser.add_argument('--sizes', default='10,100,1000', help="Tamanhos dos lotes, separados por vírgula")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.05, help="Latência simulada da API (s)")
+    parser.add_argument('--image-latency', type=float, default=0.01, help="Latência simulada das imagens (s)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fração de respostas 503 do backend")
+    parser.add_argument('--images-per-product', type=int, default=8)
+    parser.add_argument('--output', help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Piora relativa aceita em relação à base")
+    # Uso interno: execução de um único cenário no subprocesso
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario, args.size, args.base_url, args.images_per_product)))
+        return 0
+
+    config = StubConfig(args.latency, args.fail_rate, args.images_per_product, args.image_latency)
+    server, base_url = start_stub_server(config)
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = []
+    try:
+        for name in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+            for size in ([1] if name == 'single_docx' else sizes):
+                result = _run_in_subprocess(name, size, base_url, args)
+                print(f"{name}[{size}]: {result}", file=sys.stderr)
+                results.append(result)
+    finally:
+        server.shutdown()
+
+    report = {
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'config': {
+            'latency': args.latency, 'image_latency': args.image_latency,
+            'fail_rate': args.fail_rate, 'images_per_product': args.images_per_product,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSÃO: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
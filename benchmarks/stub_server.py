@@ -0,0 +1,166 @@
+# benchmarks/stub_server.py
+"""
+Backend local que imita /analyze, /optimize e /batch_analyze e serve imagens de
+produto, com latência e taxa de falhas configuráveis. Usado pelos benchmarks.
+
+Uso avulso:
+    python benchmarks/stub_server.py --port 8765 --latency 0.2 --fail-rate 0.05
+"""
+import argparse
+import io
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageDraw
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_PATH = os.path.join(REPO_DIR, 'globald_logo_512x512_original.jpg')
+
+REPORT_TEMPLATE = """## Resumo da Análise
+
+**Produto:** {asin}
+
+### Inconsistências Encontradas
+- **Título x Imagem 2:** a cor descrita no título não corresponde à imagem.
+- **Bullet 3:** a dimensão informada difere da imagem de medidas.
+- O material citado na descrição não aparece nas imagens.
+
+### Recomendações
+1. Ajustar o título para refletir a cor correta.
+2. Revisar as medidas no terceiro bullet point.
+
+| Campo | Situação |
+|---|---|
+| Título | Inconsistente |
+| Imagens | OK |
+"""
+
+
+class StubConfig:
+    def __init__(self, latency: float = 0.0, fail_rate: float = 0.0, images_per_product: int = 8, image_latency: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.images_per_product = images_per_product
+        self.image_latency = image_latency
+        self.base_url = ""
+
+
+def _asin_from(url: str, fallback: int) -> str:
+    match = re.search(r'/dp/([A-Z0-9]{10})', url or "")
+    return match.group(1) if match else f"B{fallback:09d}"
+
+
+def analysis_payload(config: StubConfig, amazon_url: str, index: int = 0) -> dict:
+    """Resposta fictícia no mesmo formato de /analyze."""
+    asin = _asin_from(amazon_url, index)
+    photos = [f"{config.base_url}/images/{asin}/{i}.jpg" for i in range(config.images_per_product)]
+    return {
+        'asin': asin,
+        'country': 'BR',
+        'product_title': f"Produto de Teste {asin} - Kit com 3 unidades, cor azul",
+        'product_image_url': photos[0] if photos else None,
+        'product_photos': photos,
+        'report': REPORT_TEMPLATE.format(asin=asin),
+    }
+
+
+def image_for(base_image: Image.Image, path: str) -> bytes:
+    """
+    JPEG diferente para cada URL (uma faixa com cor e posição derivadas do caminho),
+    para que deduplicação e caches de imagem não pareçam melhores que no tráfego real.
+    """
+    seed = zlib.crc32(path.encode('utf-8'))
+    image = base_image.copy()
+    draw = ImageDraw.Draw(image)
+    top = seed % (image.height - 32)
+    draw.rectangle((0, top, image.width, top + 32), fill=(seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF))
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+
+def make_handler(config: StubConfig, base_image: Image.Image):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _maybe_fail(self) -> bool:
+            if config.fail_rate and random.random() < config.fail_rate:
+                self._send(503, b'{"detail": "stub: falha simulada"}', 'application/json')
+                return True
+            return False
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if config.latency:
+                time.sleep(config.latency)
+            if self._maybe_fail():
+                return
+            if self.path == '/analyze':
+                body = analysis_payload(config, payload.get('amazon_url'))
+            elif self.path == '/optimize':
+                body = {'optimized_listing_report': "# Listing Otimizado\n\n**Título:** Produto de Teste"}
+            elif self.path == '/batch_analyze':
+                urls = payload.get('amazon_urls', [])
+                body = {'results': [analysis_payload(config, url, i) for i, url in enumerate(urls)]}
+            else:
+                self._send(404, b'{"detail": "not found"}', 'application/json')
+                return
+            self._send(200, json.dumps(body).encode('utf-8'), 'application/json')
+
+        def do_GET(self):
+            if not self.path.startswith('/images/'):
+                self._send(404, b'not found', 'text/plain')
+                return
+            if config.image_latency:
+                time.sleep(config.image_latency)
+            if self._maybe_fail():
+                return
+            self._send(200, image_for(base_image, self.path), 'image/jpeg')
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(config: StubConfig, host: str = '127.0.0.1', port: int = 0):
+    """Inicia o servidor em uma thread e retorna (servidor, URL base)."""
+    with Image.open(IMAGE_PATH) as image:
+        base_image = image.convert('RGB')
+    server = ThreadingHTTPServer((host, port), make_handler(config, base_image))
+    server.daemon_threads = True
+    config.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, config.base_url
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backend local de teste para os benchmarks.")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latência das chamadas à API (s)")
+    parser.add_argument('--image-latency', type=float, default=0.0, help="Latência do download de imagens (s)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument('--images-per-product', type=int, default=8)
+    args = parser.parse_args()
+    stub_config = StubConfig(args.latency, args.fail_rate, args.images_per_product, args.image_latency)
+    _, base_url = start_stub_server(stub_config, port=args.port)
+    print(f"Backend de teste em {base_url} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,148 @@
+# checkpoint_store.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Banco local onde os resultados de cada análise em lote são gravados assim que chegam
+CHECKPOINT_DB = os.environ.get(
+    'GLOBALD_CHECKPOINT_DB',
+    os.path.join(os.path.expanduser('~'), '.cache', 'globald', 'batch_jobs.sqlite3')
+)
+
+
+def job_id_for(urls: list) -> str:
+    """O ID do job é derivado da lista de URLs: reenviar o mesmo arquivo retoma o job interrompido."""
+    raw = json.dumps(list(urls), ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+
+class CheckpointStore:
+    """
+    Guarda, por job, a lista de URLs e o resultado de cada URL já concluída
+    (indexado pela posição na lista), para permitir retomar jobs interrompidos
+    e reexportar jobs finalizados sem chamar o backend.
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, urls TEXT NOT NULL, total INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL, finished_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "job_id TEXT NOT NULL, position INTEGER NOT NULL, url TEXT NOT NULL, "
+                "result TEXT NOT NULL, PRIMARY KEY (job_id, position))"
+            )
+
+    def start_job(self, urls: list, restart: bool = False) -> str:
+        """
+        Registra o job e retorna seu ID. Um job interrompido com as mesmas URLs é
+        retomado; um job já finalizado (ou qualquer um, com `restart`) é descartado
+        e recomeça do zero.
+        """
+        job_id = job_id_for(urls)
+        now = time.time()
+        finished_only = "" if restart else " AND finished_at IS NOT NULL"
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM results WHERE job_id IN "
+                f"(SELECT job_id FROM jobs WHERE job_id = ?{finished_only})", (job_id,)
+            )
+            self._conn.execute(f"DELETE FROM jobs WHERE job_id = ?{finished_only}", (job_id,))
+            self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (job_id, urls, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, json.dumps(list(urls), ensure_ascii=False), len(urls), now, now)
+            )
+        return job_id
+
+    def save_results(self, job_id: str, positions: list, urls: list, results: list):
+        """Grava os resultados concluídos de um bloco de URLs."""
+        rows = [
+            (job_id, position, url, json.dumps(result, ensure_ascii=False))
+            for position, url, result in zip(positions, urls, results)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (job_id, position, url, result) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def mark_finished(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE jobs SET finished_at = ? WHERE job_id = ?", (time.time(), job_id))
+
+    def get_job(self, job_id: str):
+        """Retorna os dados do job (URLs, total, concluídas) ou None se não existir."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT urls, total, created_at, updated_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            done = self._conn.execute(
+                "SELECT COUNT(*) FROM results WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+        return {
+            'job_id': job_id,
+            'urls': json.loads(row[0]),
+            'total': row[1],
+            'done': done,
+            'created_at': row[2],
+            'updated_at': row[3],
+            'finished_at': row[4],
+        }
+
+    def list_jobs(self, limit: int = 20) -> list:
+        """Lista os jobs mais recentes, sem carregar os resultados."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT j.job_id, j.total, j.created_at, j.updated_at, j.finished_at, COUNT(r.position) "
+                "FROM jobs j LEFT JOIN results r ON r.job_id = j.job_id "
+                "GROUP BY j.job_id ORDER BY j.updated_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {'job_id': r[0], 'total': r[1], 'created_at': r[2], 'updated_at': r[3], 'finished_at': r[4], 'done': r[5]}
+            for r in rows
+        ]
+
+    def completed_results(self, job_id: str) -> dict:
+        """Retorna {posição: resultado} de todas as URLs já concluídas no job."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT position, result FROM results WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {position: json.loads(result) for position, result in rows}
+
+    def pending_positions(self, job_id: str, total: int) -> list:
+        """Posições (na lista de URLs do job) que ainda não têm resultado."""
+        with self._lock:
+            done = {row[0] for row in self._conn.execute(
+                "SELECT position FROM results WHERE job_id = ?", (job_id,)
+            )}
+        return [i for i in range(total) if i not in done]
+
+    def delete_job(self, job_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Retorna a instância compartilhada do armazenamento de checkpoints."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore()
+        return _store
@@ -1,13 +1,43 @@
 # docx_generator.py
-import streamlit as st
-import requests
+import functools
 import io
+import logging
 import docx # <<< CORREÇÃO: Importa o módulo principal docx
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.oxml.shape import CT_Inline
+from lxml import etree
+import itertools
+import multiprocessing
 import os
-import re
+import tempfile
+import threading
+import weakref
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from image_fetcher import prefetch_images
+from perf import PerfRecorder, bind, count, replay, span
+from image_processing import normalize_image, IMAGE_PRESETS, DEFAULT_PRESET
+from markdown_docx import render_markdown
+from report_settings import (
+    DOCX_MIME, ZIP_MIME, BATCH_VOLUME_MAX_PRODUCTS, BATCH_VOLUME_MAX_MB, PREFETCH_WINDOW,
+    PRODUCT_IMAGE_WIDTH_IN, LOGO_WIDTH_IN, LOGO_PATH, LOGO_AVAILABLE, TAGLINE, product_url_for
+)
+
+logger = logging.getLogger(__name__)
+
+# Processos usados para desenhar as seções dos produtos em paralelo nos relatórios em lote
+# (1 desativa o modo paralelo). Lotes pequenos não compensam o custo de enviar os dados aos processos.
+DOCX_WORKERS = int(os.environ.get('GLOBALD_DOCX_WORKERS', min(8, os.cpu_count() or 1)))
+PARALLEL_MIN_PRODUCTS = 20
+
+if not LOGO_AVAILABLE:
+    logger.warning("Arquivo do logo '%s' não encontrado; os relatórios serão gerados sem ele.", LOGO_PATH)
 
 def _add_hyperlink(paragraph, text, url):
     """
@@ -32,10 +62,57 @@ def _add_hyperlink(paragraph, text, url):
     paragraph._p.append(hyperlink)
     return hyperlink
 
-def _draw_report_content_docx(document, info: dict, product_url: str):
+_shape_ids = weakref.WeakKeyDictionary()
+
+def _next_shape_id(document) -> int:
+    # Mesmo valor de StoryPart.next_id (maior id do documento + 1), mas sem percorrer
+    # o documento inteiro a cada imagem, o que torna os relatórios em lote quadráticos
+    part = document.part
+    ids = _shape_ids.get(part)
+    if ids is None:
+        ids = _shape_ids[part] = itertools.count(part.next_id)
+    return next(ids)
+
+def _add_centered_picture(document, content: bytes, width_in: float, image_preset: str):
+    # Equivale a document.add_picture, mas devolve o parágrafo diretamente: document.paragraphs[-1]
+    # também percorre o documento inteiro a cada chamada
+    # Retorna o tamanho da imagem embutida, usado para estimar o tamanho do documento
+    normalized = normalize_image(content, width_in, image_preset)
+    paragraph = document.add_paragraph()
+    r_id, image = document.part.get_or_add_image(io.BytesIO(normalized))
+    cx, cy = image.scaled_dimensions(Inches(width_in), None)
+    inline = CT_Inline.new_pic_inline(_next_shape_id(document), r_id, image.filename, cx, cy)
+    paragraph.add_run()._r.add_drawing(inline)
+    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    return len(normalized)
+
+@functools.lru_cache(maxsize=len(IMAGE_PRESETS))
+def _template_bytes(image_preset: str) -> bytes:
+    """
+    Cabeçalho da marca (logo e slogan) montado uma vez por preset e guardado
+    como .docx em memória; cada exportação parte de uma cópia dele.
+    """
+    document = Document()
+    if LOGO_AVAILABLE:
+        with open(LOGO_PATH, 'rb') as f:
+            _add_centered_picture(document, f.read(), LOGO_WIDTH_IN, image_preset)
+    p_tagline = document.add_paragraph(TAGLINE)
+    p_tagline.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    template = io.BytesIO()
+    document.save(template)
+    return template.getvalue()
+
+def _new_document(image_preset: str):
+    return Document(io.BytesIO(_template_bytes(image_preset)))
+
+def _draw_report_content_docx(document, info: dict, product_url: str, images: dict = None, image_preset: str = DEFAULT_PRESET):
     """
     Desenha o conteúdo do relatório de UM produto no documento Word fornecido.
+    `images` é o mapa {url: bytes} já baixado; se ausente, as imagens são baixadas aqui.
+    As imagens são redimensionadas e recomprimidas conforme `image_preset`.
+    Retorna o total de bytes de imagem embutidos.
     """
+    embedded_bytes = 0
     # Bloco de Informações do Produto
     p_title = document.add_heading(info.get('product_title', 'Título não encontrado'), level=1)
     p_title.alignment = WD_ALIGN_PARAGRAPH.CENTER
@@ -52,75 +129,277 @@ def _draw_report_content_docx(document, info: dict, product_url: str):
     document.add_heading("Relatório de Inconsistências e Melhorias", level=2).alignment = WD_ALIGN_PARAGRAPH.CENTER
     
     report_text = info.get('report', 'Nenhum relatório disponível.')
-    p_report = document.add_paragraph()
-    # Processa o negrito do Markdown para o formato do Word
-    parts = re.split(r'(\*\*.*?\*\*)', report_text)
-    for part in parts:
-        if part.startswith('**') and part.endswith('**'):
-            p_report.add_run(part[2:-2]).bold = True
-        else:
-            p_report.add_run(part)
+    # Títulos do Markdown ficam abaixo dos títulos do relatório (nível 2)
+    render_markdown(document, report_text, top_heading_level=3)
 
     # Bloco de Imagens do Produto
     document.add_heading("Imagens do Produto", level=2).alignment = WD_ALIGN_PARAGRAPH.CENTER
     image_urls = info.get('product_photos', [])
     if not image_urls:
         document.add_paragraph("Nenhuma imagem adicional encontrada.")
+    if images is None:
+        images = prefetch_images(image_urls)
     
     for i, url in enumerate(image_urls):
         try:
-            response = requests.get(url, timeout=20)
-            response.raise_for_status()
-            image_stream = io.BytesIO(response.content)
-            
-            document.add_picture(image_stream, width=Inches(3.5))
+            content = images.get(url)
+            if content is None:
+                raise ValueError(f"imagem indisponível: {url}")
+            embedded_bytes += _add_centered_picture(document, content, PRODUCT_IMAGE_WIDTH_IN, image_preset)
             
-            document.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
             p_caption = document.add_paragraph(f"Imagem {i+1}")
             p_caption.alignment = WD_ALIGN_PARAGRAPH.CENTER
         except Exception as e:
             document.add_paragraph(f"Erro ao carregar imagem {i+1}.").alignment = WD_ALIGN_PARAGRAPH.CENTER
-            print(f"Erro ao baixar imagem para DOCX: {e}")
+            print(f"Erro ao inserir imagem no DOCX: {e}")
+            count("docx.images_failed")
+    return embedded_bytes
 
-def create_single_docx_report(info: dict, product_url: str):
+def create_single_docx_report(info: dict, product_url: str, image_preset: str = DEFAULT_PRESET):
     """Cria e retorna um DOCX para um único relatório."""
-    document = Document()
-    logo_path = 'globald_logo_512x512_original.jpg'
-    if os.path.exists(logo_path):
-        p_logo = document.add_picture(logo_path, width=Inches(1.5))
-        document.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    else:
-        st.warning(f"Arquivo do logo '{logo_path}' não encontrado.")
-    
-    p_tagline = document.add_paragraph('AI Compliance Relatório by www.GlobalD.ai')
-    p_tagline.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    _draw_report_content_docx(document, info, product_url)
+    document = _new_document(image_preset)
+
+    with span("docx.assemble", products=1):
+        _draw_report_content_docx(document, info, product_url, image_preset=image_preset)
     
+    return _save_document(document)
+
+def create_listing_docx_report(listing_report: str, product_url: str, product_title: str = None):
+    """Cria e retorna um DOCX com o listing otimizado retornado por /optimize."""
+    document = _new_document(DEFAULT_PRESET)
+    document.add_heading("Listing Otimizado", level=1).alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    if product_title:
+        p_product = document.add_paragraph()
+        p_product.add_run('Produto original: ').bold = True
+        p_product.add_run(product_title)
+    p_link = document.add_paragraph()
+    p_link.add_run('Link do Produto: ').bold = True
+    _add_hyperlink(p_link, product_url, product_url)
+
+    with span("docx.assemble", products=1):
+        render_markdown(document, listing_report, top_heading_level=2)
+
+    return _save_document(document)
+
+def _save_document(document):
     doc_io = io.BytesIO()
-    document.save(doc_io)
+    with span("docx.save") as s:
+        document.save(doc_io)
+        s.set(bytes=doc_io.tell())
     doc_io.seek(0)
     return doc_io
 
-def create_batch_docx_report(batch_results: list, urls: list):
-    """Cria um DOCX consolidado a partir de uma lista de resultados."""
-    document = Document()
-    logo_path = 'globald_logo_512x512_original.jpg'
-    if os.path.exists(logo_path):
-        p_logo = document.add_picture(logo_path, width=Inches(1.5))
-        document.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    p_tagline = document.add_paragraph('AI Compliance Relatório by www.GlobalD.ai')
-    p_tagline.alignment = WD_ALIGN_PARAGRAPH.CENTER
+def _new_batch_document(image_preset: str):
+    document = _new_document(image_preset)
     document.add_paragraph()
+    return document
+
+_render_pool = None
+_render_pool_workers = 0
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool(workers: int):
+    """Pool de processos compartilhado, criado na primeira exportação paralela."""
+    global _render_pool, _render_pool_workers
+    with _render_pool_lock:
+        if _render_pool is None or _render_pool_workers != workers:
+            if _render_pool is not None:
+                _render_pool.shutdown(wait=False, cancel_futures=True)
+            # 'spawn' evita herdar por fork as threads do servidor Streamlit
+            _render_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _render_pool_workers = workers
+        return _render_pool
 
-    for i, result_info in enumerate(batch_results):
+def _discard_render_pool(wait: bool = False):
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=wait, cancel_futures=True)
+            _render_pool = None
+
+def _render_section(info: dict, product_url: str, images: dict, image_preset: str):
+    """
+    Executado em um processo do pool: desenha um produto em um documento vazio e
+    devolve os elementos do corpo serializados, o destino de cada relacionamento
+    (imagem ou hyperlink), o total de bytes de imagem embutidos e os spans e
+    contadores de desempenho coletados no processo.
+    """
+    recorder = PerfRecorder()
+    bind(recorder)
+    try:
+        document = Document()
+        embedded_bytes = _draw_report_content_docx(document, info, product_url, images, image_preset)
+    finally:
+        bind(None)
+    fragments = [etree.tostring(child) for child in document.element.body if child.tag != qn('w:sectPr')]
+    rels = {}
+    for r_id, rel in document.part.rels.items():
+        if rel.is_external:
+            rels[r_id] = (rel.reltype, rel.target_ref)
+        elif rel.reltype == RT.IMAGE:
+            rels[r_id] = (rel.reltype, rel.target_part.blob)
+    return fragments, rels, embedded_bytes, list(recorder.spans), dict(recorder.counters)
+
+_REL_ATTRS = (qn('r:embed'), qn('r:id'), qn('r:link'))
+
+class _SectionMerger:
+    """
+    Anexa a um documento as seções desenhadas por `_render_section`, na ordem.
+    Os relacionamentos e os ids das imagens são criados na mesma sequência do modo
+    serial, então o documento final é idêntico ao gerado sem o pool.
+    """
+
+    def __init__(self, document):
+        self.document = document
+
+    def append(self, section) -> int:
+        fragments, rels, embedded_bytes = section
+        part = self.document.part
+        body = self.document.element.body
+        sect_pr = body.find(qn('w:sectPr'))
+        remap = {}
+        for fragment in fragments:
+            element = parse_xml(fragment)
+            for node in element.iter():
+                for attr in _REL_ATTRS:
+                    old_id = node.get(attr)
+                    if old_id is None or old_id not in rels:
+                        continue
+                    if old_id not in remap:
+                        reltype, target = rels[old_id]
+                        if reltype == RT.IMAGE:
+                            remap[old_id] = part.get_or_add_image(io.BytesIO(target))[0]
+                        else:
+                            remap[old_id] = part.relate_to(target, reltype, is_external=True)
+                    node.set(attr, remap[old_id])
+                if node.tag == qn('wp:docPr'):
+                    shape_id = _next_shape_id(self.document)
+                    node.set('id', str(shape_id))
+                    node.set('name', f"Picture {shape_id}")
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
+            else:
+                body.append(element)
+        return embedded_bytes
+
+def _iter_product_sections(batch_results: list, urls, image_preset: str, workers: int = None):
+    """
+    Percorre os produtos em ordem, baixando as imagens por janela. Gera
+    (info, url do produto, imagens, seção): com mais de um processo, a seção já vem
+    desenhada pelo pool (para `_SectionMerger`); no modo serial, é None.
+    """
+    workers = DOCX_WORKERS if workers is None else workers
+    pool = None
+    if workers > 1 and len(batch_results) >= PARALLEL_MIN_PRODUCTS:
+        pool = _get_render_pool(workers)
+
+    for start in range(0, len(batch_results), PREFETCH_WINDOW):
+        # Baixa as imagens da próxima janela de produtos de uma só vez
+        window = batch_results[start:start + PREFETCH_WINDOW]
+        images = prefetch_images(url for item in window for url in item.get('product_photos', []))
+        jobs = []
+        for i, result_info in enumerate(window, start):
+            product_url = product_url_for(urls, i)
+            future = None
+            if pool is not None:
+                own_images = {url: images.get(url) for url in result_info.get('product_photos', [])}
+                try:
+                    future = pool.submit(_render_section, result_info, product_url, own_images, image_preset)
+                except (BrokenProcessPool, RuntimeError) as e:
+                    print(f"Pool de renderização do DOCX indisponível, usando o modo serial: {e}")
+                    _discard_render_pool()
+                    pool = None
+            jobs.append((result_info, product_url, future))
+
+        for result_info, product_url, future in jobs:
+            section = None
+            if future is not None:
+                try:
+                    fragments, rels, embedded_bytes, spans, counters = future.result()
+                    section = fragments, rels, embedded_bytes
+                    replay(spans, counters)
+                except Exception as e:
+                    # Se o pool falhar, o produto é desenhado aqui mesmo (o resultado é o mesmo)
+                    print(f"Erro na renderização paralela do DOCX, usando o modo serial: {e}")
+                    if isinstance(e, BrokenProcessPool):
+                        # Os produtos seguintes são desenhados em modo serial
+                        _discard_render_pool()
+                        pool = None
+            yield result_info, product_url, images, section
+
+def _add_product(document, merger, item, image_preset: str) -> int:
+    result_info, product_url, images, section = item
+    with span("docx.assemble", products=1, parallel=section is not None):
+        if section is not None:
+            return merger.append(section)
+        return _draw_report_content_docx(document, result_info, product_url, images, image_preset)
+
+def create_batch_docx_report(batch_results: list, urls, image_preset: str = DEFAULT_PRESET, workers: int = None):
+    """
+    Cria um DOCX consolidado a partir de uma lista de resultados e das URLs dos produtos, na mesma ordem.
+    Em lotes grandes, as seções dos produtos são desenhadas em `workers` processos.
+    """
+    document = _new_batch_document(image_preset)
+    merger = _SectionMerger(document)
+
+    for i, item in enumerate(_iter_product_sections(batch_results, urls, image_preset, workers)):
         if i > 0:
             document.add_page_break()
-        product_url = urls[i] if i < len(urls) else "URL não encontrada"
-        _draw_report_content_docx(document, result_info, product_url)
+        _add_product(document, merger, item, image_preset)
 
-    doc_io = io.BytesIO()
-    document.save(doc_io)
-    doc_io.seek(0)
-    return doc_io
+    return _save_document(document)
+
+def _save_volume(document, path: str):
+    with span("docx.save") as s:
+        document.save(path)
+        s.set(bytes=os.path.getsize(path))
+    return path
+
+def create_batch_docx_export(batch_results: list, urls, image_preset: str = DEFAULT_PRESET,
+                             max_products: int = BATCH_VOLUME_MAX_PRODUCTS, max_mb: float = BATCH_VOLUME_MAX_MB,
+                             output_dir: str = None, base_name: str = "relatorio_consolidado_analise",
+                             workers: int = None):
+    """
+    Exporta o relatório consolidado direto para arquivos em disco, com memória limitada:
+    cada volume é fechado ao atingir `max_products` produtos ou cerca de `max_mb` MB de
+    imagens. Com um único volume, retorna o .docx; com vários, um .zip com todos eles.
+    As seções podem ser desenhadas em paralelo, como em `create_batch_docx_report`.
+    Retorna (caminho, nome do arquivo para download, mime).
+    """
+    output_dir = output_dir or tempfile.mkdtemp(prefix="globald_export_")
+    max_bytes = max_mb * 1024 * 1024
+    volumes = []
+    document = None
+    for item in _iter_product_sections(batch_results, urls, image_preset, workers):
+        if document is None:
+            document = _new_batch_document(image_preset)
+            merger = _SectionMerger(document)
+            volume_products = 0
+            volume_bytes = 0
+        else:
+            document.add_page_break()
+        volume_bytes += _add_product(document, merger, item, image_preset)
+        volume_products += 1
+        if volume_products >= max_products or volume_bytes >= max_bytes:
+            volume_path = os.path.join(output_dir, f"{base_name}_parte_{len(volumes) + 1:02d}.docx")
+            volumes.append(_save_volume(document, volume_path))
+            document = None
+
+    if document is not None or not volumes:
+        document = document or _new_batch_document(image_preset)
+        volume_path = os.path.join(output_dir, f"{base_name}_parte_{len(volumes) + 1:02d}.docx")
+        volumes.append(_save_volume(document, volume_path))
+
+    if len(volumes) == 1:
+        final_path = os.path.join(output_dir, f"{base_name}.docx")
+        os.replace(volumes[0], final_path)
+        return final_path, f"{base_name}.docx", DOCX_MIME
+
+    # Os .docx já são compactados: o ZIP apenas agrupa os volumes, sem recomprimir
+    zip_path = os.path.join(output_dir, f"{base_name}.zip")
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for volume_path in volumes:
+            archive.write(volume_path, arcname=os.path.basename(volume_path))
+            os.remove(volume_path)
+    return zip_path, f"{base_name}.zip", ZIP_MIME
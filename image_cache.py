@@ -0,0 +1,155 @@
+# image_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Configuração do cache local de imagens (pode ser ajustada por variáveis de ambiente)
+CACHE_DIR = os.environ.get(
+    'GLOBALD_IMAGE_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'globald', 'images')
+)
+CACHE_MAX_MB = float(os.environ.get('GLOBALD_IMAGE_CACHE_MB', '500'))
+
+
+class ImageCache:
+    """
+    Cache em disco endereçado por conteúdo: cada URL aponta para o hash SHA-256
+    dos bytes da imagem, e cada conteúdo é gravado uma única vez. Quando o
+    tamanho total passa de `max_bytes`, os conteúdos menos usados são removidos (LRU).
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(directory, 'index.sqlite3'), timeout=30, check_same_thread=False
+        )
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries (url TEXT PRIMARY KEY, digest TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def get(self, url: str):
+        """Retorna os bytes em cache para a URL, ou None se não houver."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None:
+                try:
+                    with open(self._blob_path(row[0]), 'rb') as f:
+                        content = f.read()
+                except OSError:
+                    # O arquivo sumiu do disco: descarta a entrada
+                    with self._conn:
+                        self._conn.execute("DELETE FROM entries WHERE digest = ?", (row[0],))
+                        self._conn.execute("DELETE FROM blobs WHERE digest = ?", (row[0],))
+                else:
+                    with self._conn:
+                        self._conn.execute(
+                            "UPDATE blobs SET last_access = ? WHERE digest = ?", (time.time(), row[0])
+                        )
+                    self.hits += 1
+                    return content
+            self.misses += 1
+            return None
+
+    def put(self, url: str, content: bytes):
+        """Grava a imagem no cache e aplica a política de remoção LRU."""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, size, last_access) VALUES (?, ?, ?)",
+                    (digest, len(content), time.time())
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (url, digest) VALUES (?, ?)", (url, digest)
+                )
+            self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT digest, size FROM blobs ORDER BY last_access").fetchall()
+        with self._conn:
+            for digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE digest = ?", (digest,))
+                self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Retorna contadores de acertos/erros e o uso atual do cache."""
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': count,
+            'bytes': total,
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        """Remove todas as imagens do cache."""
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute("SELECT digest FROM blobs")]
+            with self._conn:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM blobs")
+            for digest in digests:
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+
+
+_cache = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    """Retorna o cache de imagens do processo, ou None se estiver desativado."""
+    global _cache, _cache_failed
+    if CACHE_MAX_MB <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = ImageCache(CACHE_DIR, int(CACHE_MAX_MB * 1024 * 1024))
+            except (OSError, sqlite3.Error) as e:
+                print(f"Cache de imagens desativado: {e}")
+                _cache_failed = True
+        return _cache
@@ -0,0 +1,78 @@
+# image_fetcher.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from backend_client import get_backend_client
+from image_cache import get_image_cache
+from perf import span, count, propagate
+
+# Limites de concorrência para o download das imagens dos produtos
+MAX_WORKERS = 16
+MAX_PER_HOST = 6
+
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+
+def _host_semaphore(url: str):
+    host = urlsplit(url).netloc.lower()
+    with _host_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(MAX_PER_HOST)
+        return _host_semaphores[host]
+
+
+def _fetch_with_source(url: str):
+    # Retorna (bytes ou None, veio_do_cache)
+    cache = get_image_cache()
+    if cache is not None:
+        # Um erro na leitura do cache é tratado como ausência: a imagem é baixada da rede
+        try:
+            content = cache.get(url)
+        except Exception as e:
+            print(f"Erro ao ler imagem do cache: {e}")
+            content = None
+        if content is not None:
+            return content, True
+    try:
+        with _host_semaphore(url):
+            content = get_backend_client().get_image(url)
+    except Exception as e:
+        print(f"Erro ao baixar imagem para DOCX: {e}")
+        return None, False
+    if cache is not None:
+        # Uma falha ao gravar no cache (disco cheio, SQLite bloqueado) não descarta a imagem já baixada
+        try:
+            cache.put(url, content)
+        except Exception as e:
+            print(f"Erro ao gravar imagem no cache: {e}")
+    return content, False
+
+
+def fetch_image(url: str):
+    """Baixa uma imagem e retorna seus bytes, ou None em caso de erro. Consulta o cache local antes da rede."""
+    return _fetch_with_source(url)[0]
+
+
+def prefetch_images(urls, max_workers: int = MAX_WORKERS) -> dict:
+    """
+    Baixa todas as imagens em paralelo e retorna um dicionário {url: bytes ou None}.
+    URLs repetidas são baixadas uma única vez.
+    """
+    unique_urls = list(dict.fromkeys(url for url in urls if url))
+    if not unique_urls:
+        return {}
+    workers = max(1, min(max_workers, len(unique_urls)))
+    with span("images.prefetch", images=len(unique_urls)) as s:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            fetched = list(executor.map(propagate(_fetch_with_source), unique_urls))
+        images = {url: content for url, (content, _) in zip(unique_urls, fetched)}
+        fetched_bytes = sum(len(content) for content, from_cache in fetched if content and not from_cache)
+        failed = sum(1 for content, _ in fetched if content is None)
+        cache_hits = sum(1 for _, from_cache in fetched if from_cache)
+        s.set(bytes=fetched_bytes, failed=failed, cache_hits=cache_hits)
+    count("images.bytes_fetched", fetched_bytes)
+    count("images.failed", failed)
+    count("images.cache_hits", cache_hits)
+    return images
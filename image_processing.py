@@ -0,0 +1,67 @@
+# image_processing.py
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+# Presets de exportação: resolução (pontos por polegada na largura exibida) e qualidade JPEG
+IMAGE_PRESETS = {
+    "Alta qualidade": {'dpi': 220, 'quality': 90},
+    "Padrão": {'dpi': 150, 'quality': 80},
+    "Compacto": {'dpi': 96, 'quality': 65},
+}
+DEFAULT_PRESET = "Padrão"
+MEMO_SIZE = 512
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _encode(content: bytes, width_in: float, preset: dict) -> bytes:
+    # O Pillow só é carregado na primeira exportação (os presets são usados já na interface)
+    from PIL import Image
+
+    with Image.open(io.BytesIO(content)) as image:
+        image.load()
+        target_width = max(1, int(round(width_in * preset['dpi'])))
+        if image.width > target_width:
+            target_height = max(1, int(round(image.height * target_width / image.width)))
+            image = image.resize((target_width, target_height), Image.LANCZOS)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            # O JPEG não tem transparência: aplica a imagem sobre fundo branco
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        elif image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=preset['quality'], optimize=True)
+    encoded = output.getvalue()
+    # Se a recompressão não reduzir o arquivo, mantém o original
+    return encoded if len(encoded) < len(content) else content
+
+
+def normalize_image(content: bytes, width_in: float, preset_name: str = DEFAULT_PRESET) -> bytes:
+    """
+    Redimensiona a imagem para a quantidade de pixels que a largura exibida no
+    documento realmente usa e a recomprime em JPEG conforme o preset. Conteúdos
+    idênticos são processados uma única vez e produzem os mesmos bytes, então o
+    python-docx os embute uma só vez no documento. Em caso de erro, retorna o original.
+    """
+    preset = IMAGE_PRESETS.get(preset_name, IMAGE_PRESETS[DEFAULT_PRESET])
+    key = (hashlib.sha1(content).hexdigest(), width_in, preset_name)
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    try:
+        normalized = _encode(content, width_in, preset)
+    except Exception as e:
+        print(f"Erro ao otimizar imagem, usando o original: {e}")
+        normalized = content
+    with _memo_lock:
+        _memo[key] = normalized
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return normalized
@@ -0,0 +1,236 @@
+# markdown_docx.py
+"""
+Conversão do Markdown retornado pelo backend (relatórios e listings otimizados)
+em elementos do Word: títulos, listas, parágrafos com negrito/itálico e tabelas.
+O texto é percorrido uma única vez, linha a linha, e o resultado da análise fica
+memorizado pelo hash do texto; só a escrita no documento se repete.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+MEMO_SIZE = 256
+MAX_LIST_LEVEL = 3
+LIST_INDENT_IN = 0.25
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_BULLET_RE = re.compile(r'^(\s*)[-*+]\s+(.*)$')
+_NUMBERED_RE = re.compile(r'^(\s*)(\d+[.)])\s+(.*)$')
+_RULE_RE = re.compile(r'^\s*([-*_])(\s*\1){2,}\s*$')
+_TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+# Marcadores de ênfase: ***negrito e itálico***, **negrito**, __negrito__, *itálico*
+_EMPHASIS_RE = re.compile(r'(\*\*\*|\*\*|__|\*)')
+# Texto entre __ que é só um identificador (__init__, __name__) não é ênfase
+_IDENTIFIER_RE = re.compile(r'\w+')
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def parse_inline(text: str) -> tuple:
+    """
+    Divide uma linha em trechos (texto, negrito, itálico). Como no Markdown, um
+    marcador só abre a ênfase se for seguido de um caractere que não seja espaço
+    e só a fecha se vier logo depois de um; marcadores sem par, soltos entre
+    espaços (2 * 3 * 4) ou com __ no meio de uma palavra são mantidos como texto.
+    """
+    parts = _EMPHASIS_RE.split(text)
+    # Posições (índices ímpares) dos marcadores que têm par
+    paired = set()
+    open_at = {}
+    offset = 0
+    for i, part in enumerate(parts):
+        start, offset = offset, offset + len(part)
+        if i % 2 == 0:
+            continue
+        before = text[start - 1] if start else ' '
+        after = text[offset] if offset < len(text) else ' '
+        can_open, can_close = not after.isspace(), not before.isspace()
+        if part == '__':
+            can_open = can_open and not before.isalnum()
+            can_close = can_close and not after.isalnum()
+        if can_close and part in open_at:
+            opened = open_at.pop(part)
+            if part == '__' and _IDENTIFIER_RE.fullmatch(''.join(parts[opened + 1:i])):
+                continue
+            paired.update((opened, i))
+        elif can_open:
+            open_at[part] = i
+
+    runs = []
+    bold = italic = False
+    for i, part in enumerate(parts):
+        if i % 2 == 1 and i in paired:
+            if part in ('**', '__', '***'):
+                bold = not bold
+            if part in ('*', '***'):
+                italic = not italic
+        elif part:
+            if runs and runs[-1][1] == bold and runs[-1][2] == italic:
+                runs[-1] = (runs[-1][0] + part, bold, italic)
+            else:
+                runs.append((part, bold, italic))
+    return tuple(runs)
+
+
+def _split_row(line: str) -> list:
+    cells = line.strip()
+    if cells.startswith('|'):
+        cells = cells[1:]
+    if cells.endswith('|'):
+        cells = cells[:-1]
+    return [parse_inline(cell.strip()) for cell in cells.split('|')]
+
+
+def _parse(text: str) -> tuple:
+    blocks = []
+    paragraph = []
+    table = []
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(('paragraph', tuple(paragraph)))
+            paragraph.clear()
+
+    def flush_table():
+        if table:
+            blocks.append(('table', tuple(table)))
+            table.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('|'):
+            flush_paragraph()
+            if not _TABLE_SEPARATOR_RE.match(stripped):
+                table.append(tuple(_split_row(stripped)))
+            continue
+        flush_table()
+
+        if not stripped:
+            flush_paragraph()
+            continue
+        if _RULE_RE.match(line):
+            flush_paragraph()
+            continue
+        match = _HEADING_RE.match(stripped)
+        if match:
+            flush_paragraph()
+            blocks.append(('heading', len(match.group(1)), parse_inline(match.group(2))))
+            continue
+        match = _BULLET_RE.match(line)
+        if match:
+            flush_paragraph()
+            level = min(len(match.group(1).expandtabs(4)) // 2, MAX_LIST_LEVEL - 1)
+            blocks.append(('bullet', level, parse_inline(match.group(2))))
+            continue
+        match = _NUMBERED_RE.match(line)
+        if match:
+            flush_paragraph()
+            level = min(len(match.group(1).expandtabs(4)) // 2, MAX_LIST_LEVEL - 1)
+            blocks.append(('numbered', level, ((match.group(2) + ' ', False, False),) + parse_inline(match.group(3))))
+            continue
+        # Linhas seguidas formam um parágrafo, com quebra de linha entre elas
+        if paragraph:
+            paragraph.append(('\n', False, False))
+        paragraph.extend(parse_inline(stripped))
+
+    flush_paragraph()
+    flush_table()
+    return tuple(blocks)
+
+
+def parse_markdown(text: str) -> tuple:
+    """
+    Converte o Markdown em uma sequência de blocos:
+    ('heading', nível, trechos), ('paragraph', trechos), ('bullet', nível, trechos),
+    ('numbered', nível, trechos) e ('table', linhas de células). O resultado é
+    memorizado pelo hash do texto.
+    """
+    key = hashlib.sha1(text.encode('utf-8')).hexdigest()
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    blocks = _parse(text)
+    with _memo_lock:
+        _memo[key] = blocks
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+    return blocks
+
+
+def _add_runs(paragraph, runs, bold: bool = False):
+    for text, run_bold, italic in runs:
+        run = paragraph.add_run(text)
+        if run_bold or bold:
+            run.bold = True
+        if italic:
+            run.italic = True
+
+
+def _list_style(base: str, level: int) -> str:
+    return base if level == 0 else f"{base} {level + 1}"
+
+
+class _StyleIds(dict):
+    """
+    Nome do estilo -> id no documento, resolvido uma vez por renderização.
+    Atribuir estilos pelo nome (add_heading, paragraph.style, table.style) faz o
+    python-docx percorrer todos os estilos do documento a cada chamada.
+    """
+
+    def __init__(self, document):
+        super().__init__()
+        self.document = document
+
+    def __missing__(self, name: str) -> str:
+        style_id = self.document.styles[name].style_id
+        self[name] = style_id
+        return style_id
+
+
+def _add_paragraph(document, style_ids, style_name: str = None):
+    paragraph = document.add_paragraph()
+    if style_name:
+        paragraph._p.style = style_ids[style_name]
+    return paragraph
+
+
+def render_markdown(document, text: str, top_heading_level: int = 1):
+    """
+    Escreve o Markdown no documento. O título mais alto do texto (seja '#' ou '##')
+    vira o Título `top_heading_level` do Word, e os demais seguem a partir dele.
+    """
+    # Importado aqui para que parse_markdown possa ser usado sem carregar o python-docx
+    from docx.shared import Inches
+
+    blocks = parse_markdown(text)
+    style_ids = _StyleIds(document)
+    heading_levels = [block[1] for block in blocks if block[0] == 'heading']
+    heading_offset = top_heading_level - min(heading_levels) if heading_levels else 0
+    for block in blocks:
+        kind = block[0]
+        if kind == 'heading':
+            level = min(block[1] + heading_offset, 9)
+            _add_runs(_add_paragraph(document, style_ids, f"Heading {level}"), block[2])
+        elif kind == 'paragraph':
+            _add_runs(document.add_paragraph(), block[1])
+        elif kind == 'bullet':
+            _add_runs(_add_paragraph(document, style_ids, _list_style('List Bullet', block[1])), block[2])
+        elif kind == 'numbered':
+            # A numeração original é mantida no texto: os estilos numerados do Word
+            # continuariam a contagem de uma lista para a outra ao longo do documento
+            paragraph = document.add_paragraph()
+            paragraph.paragraph_format.left_indent = Inches(LIST_INDENT_IN * (block[1] + 1))
+            _add_runs(paragraph, block[2])
+        elif kind == 'table':
+            rows = block[1]
+            columns = max(len(row) for row in rows)
+            table = document.add_table(rows=len(rows), cols=columns)
+            table._tbl.tblStyle_val = style_ids['Table Grid']
+            for row_cells, row in zip(table.rows, rows):
+                for cell, runs in zip(row_cells.cells, row):
+                    # A primeira linha é o cabeçalho da tabela
+                    _add_runs(cell.paragraphs[0], runs, bold=row is rows[0])
+            document.add_paragraph()
@@ -0,0 +1,45 @@
+# optimize_prefetch.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend_client import get_backend_client
+from perf import propagate
+from result_cache import get_result_cache
+from url_utils import product_key
+
+# Otimizações geradas em segundo plano, compartilhadas por todas as sessões do processo
+MAX_WORKERS = 4
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="optimize-prefetch")
+_in_flight = {}
+_lock = threading.Lock()
+
+
+def _run_optimize(amazon_url: str):
+    report = get_backend_client().optimize(amazon_url).get('optimized_listing_report')
+    if report:
+        get_result_cache().put("optimize", amazon_url, report)
+    return report
+
+
+def _forget(key, future):
+    with _lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+def start_optimize(amazon_url: str):
+    """
+    Dispara a chamada a /optimize em segundo plano e retorna o Future com o
+    `optimized_listing_report`. Se o mesmo produto já estiver sendo otimizado,
+    retorna a requisição em andamento em vez de abrir outra.
+    """
+    key = product_key(amazon_url)
+    with _lock:
+        future = _in_flight.get(key)
+        if future is not None and not future.done():
+            return future
+        future = _executor.submit(propagate(_run_optimize), amazon_url)
+        _in_flight[key] = future
+    future.add_done_callback(lambda f: _forget(key, f))
+    return future
@@ -1,24 +1,111 @@
 # pages/2_Análise_em_Lote.py
 import streamlit as st
-import pandas as pd
-import requests
-# <<< ALTERAÇÃO: Importa o gerador de DOCX em vez de PDF
-from docx_generator import create_batch_docx_report
+from image_processing import IMAGE_PRESETS, DEFAULT_PRESET
+# Os geradores de DOCX e PDF só são importados quando um relatório é gerado
+from report_export import render_export, render_file_export, lazy_builder
+from report_settings import BATCH_VOLUME_MAX_PRODUCTS, BATCH_VOLUME_MAX_MB
+from batch_scheduler import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_MAX_IN_FLIGHT, DEFAULT_RETRIES,
+    chunk_urls, error_result, iter_batch_results
+)
+from checkpoint_store import get_checkpoint_store
+from url_utils import dedupe_urls
+from url_ingest import ingest_urls
+from result_cache import get_result_cache, format_age
+from perf import span, count
+from perf_panel import init_perf, render_perf_panel
+from results_explorer import paginate, render_results_explorer, results_json
 
 st.set_page_config(layout="wide", page_title="Análise em Lote")
+init_perf()
 
 st.title("📦 Análise de Produtos em Lote")
 st.markdown("Faça o upload de um arquivo (.txt, .csv ou .xlsx) com uma lista de URLs da Amazon para gerar um relatório consolidado.")
 
-# URLs DA API
-BACKEND_BASE_URL = "https://globald.onrender.com"
-BATCH_ANALYZE_URL = f"{BACKEND_BASE_URL}/batch_analyze"
-
 # Inicializa o estado da sessão para esta página
 if 'batch_results' not in st.session_state:
     st.session_state.batch_results = None
 if 'uploaded_urls' not in st.session_state:
     st.session_state.uploaded_urls = None
+if 'batch_job_id' not in st.session_state:
+    st.session_state.batch_job_id = None
+if 'unique_urls' not in st.session_state:
+    st.session_state.unique_urls = None
+if 'row_index' not in st.session_state:
+    st.session_state.row_index = None
+if 'batch_result_urls' not in st.session_state:
+    st.session_state.batch_result_urls = None
+if 'batch_result_lines' not in st.session_state:
+    st.session_state.batch_result_lines = None
+
+store = get_checkpoint_store()
+result_cache = get_result_cache()
+
+
+def set_uploaded_urls(urls):
+    """Guarda as URLs do arquivo e o agrupamento delas por produto (marketplace + ASIN)."""
+    if urls == st.session_state.uploaded_urls and st.session_state.unique_urls is not None:
+        return
+    st.session_state.uploaded_urls = urls
+    st.session_state.unique_urls, st.session_state.row_index = dedupe_urls(urls)
+
+
+def set_batch_results(results):
+    """
+    Guarda os resultados (um por produto único) junto com as URLs dos produtos, na
+    mesma ordem, e as linhas do arquivo (URL, índice do produto) que os originaram:
+    um novo upload não desalinha o que já foi analisado.
+    """
+    st.session_state.batch_results = results
+    st.session_state.batch_result_urls = list(st.session_state.unique_urls) if results else None
+    st.session_state.batch_result_lines = (
+        list(zip(st.session_state.uploaded_urls, st.session_state.row_index)) if results else None
+    )
+
+
+def load_job_results(job_id, total, errors=None):
+    """
+    Monta a lista de resultados do job a partir do checkpoint, na ordem das URLs;
+    `errors` traz os erros ({posição: resultado}) desta execução, que não são gravados.
+    """
+    completed = store.completed_results(job_id)
+    errors = errors or {}
+    return [
+        completed.get(i) or errors.get(i) or error_result("URL ainda não analisada neste job")
+        for i in range(total)
+    ]
+
+
+def open_job(job_id):
+    """Carrega as URLs (e os resultados, se o job terminou) de um job salvo."""
+    job = store.get_job(job_id)
+    if job is None:
+        return False
+    st.session_state.batch_job_id = job_id
+    set_uploaded_urls(job['urls'])
+    set_batch_results(load_job_results(job_id, job['total']) if job['finished_at'] else None)
+    st.query_params["job"] = job_id
+    return True
+
+
+# Após um refresh do navegador, o job em andamento é recuperado pelo parâmetro da URL
+if st.session_state.batch_job_id is None and st.query_params.get("job"):
+    open_job(st.query_params["job"])
+
+# --- Jobs Salvos ---
+saved_jobs = store.list_jobs()
+if saved_jobs:
+    with st.expander("🗂️ Jobs anteriores (retomar ou reexportar)"):
+        job_labels = {
+            job['job_id']: (
+                f"{job['job_id']} — {job['done']}/{job['total']} concluídas"
+                f"{' ✅' if job['finished_at'] else ' ⏸️ interrompido'}"
+            )
+            for job in saved_jobs
+        }
+        selected_job = st.selectbox("Job", list(job_labels), format_func=job_labels.get)
+        if st.button("Abrir job", key="open_job_btn"):
+            open_job(selected_job)
 
 # --- Upload Box com CSS ---
 st.markdown(
@@ -55,53 +142,149 @@ with st.container():
 
 # --- Lógica de Processamento do Arquivo ---
 if uploaded_file is not None:
-    def sanitize_url(url):
-        if not isinstance(url, str) or not url.strip(): return None
-        s_url = url.strip()
-        if not s_url.startswith(('http://', 'https://')):
-            s_url = 'https://' + s_url
-        return s_url
-
-    try:
-        raw_lines = []
-        if uploaded_file.name.endswith('.txt'):
-            raw_lines = [line.decode('utf-8').strip() for line in uploaded_file.readlines()]
-        elif uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file, header=None)
-            raw_lines = df.iloc[:, 0].dropna().tolist()
-        elif uploaded_file.name.endswith('.xlsx'):
-            df = pd.read_excel(uploaded_file, header=None)
-            raw_lines = df.iloc[:, 0].dropna().tolist()
-        
-        valid_urls = [sanitize_url(line) for line in raw_lines]
-        valid_urls = [url for url in valid_urls if url]
-
-        st.session_state.uploaded_urls = valid_urls
-
-        if valid_urls:
-            st.success(f"{len(valid_urls)} URLs válidas encontradas e prontas para análise.")
-            with st.expander("Visualizar URLs carregadas"):
-                st.dataframe(valid_urls, use_container_width=True)
+    # O arquivo é lido uma única vez por upload, e não a cada rerun da página
+    if st.session_state.get('ingested_file_id') != uploaded_file.file_id:
+        try:
+            uploaded_file.seek(0)
+            with st.spinner("Lendo o arquivo de URLs..."), span("upload.ingest", file=uploaded_file.name) as s:
+                summary = ingest_urls(uploaded_file, uploaded_file.name)
+                s.set(rows=summary.total_rows, invalid=summary.invalid_count)
+            st.session_state.ingest_summary = summary._replace(urls=None)
+            st.session_state.ingested_file_id = uploaded_file.file_id
+            set_uploaded_urls(summary.urls)
+        except Exception as e:
+            st.session_state.ingest_summary = None
+            st.session_state.ingested_file_id = None
+            st.error(f"Erro ao processar o arquivo: {e}")
+
+    summary = st.session_state.get('ingest_summary')
+    if summary is not None:
+        valid_count = len(st.session_state.uploaded_urls or [])
+        if valid_count:
+            unique_count = len(st.session_state.unique_urls)
+            st.success(
+                f"{valid_count} URLs válidas encontradas ({unique_count} produtos únicos) e prontas para análise."
+            )
+            with st.expander(f"Visualizar URLs carregadas (primeiras {len(summary.preview)})"):
+                st.dataframe(summary.preview, use_container_width=True)
         else:
             st.error("0 URLs válidas encontradas no arquivo. Verifique o conteúdo do arquivo e tente novamente.")
-    except Exception as e:
-        st.error(f"Erro ao processar o arquivo: {e}")
+        if summary.invalid_count:
+            st.warning(f"{summary.invalid_count} linha(s) ignoradas por não conterem uma URL de produto da Amazon.")
+            with st.expander("Ver linhas inválidas"):
+                st.dataframe(
+                    [{"Linha": line, "Conteúdo": value} for line, value in summary.invalid_rows],
+                    use_container_width=True, hide_index=True
+                )
 
 # --- Lógica do Botão de Análise ---
 if st.session_state.uploaded_urls:
+    set_uploaded_urls(st.session_state.uploaded_urls)
+    with st.expander("⚙️ Configurações do envio em lote"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            chunk_size = st.number_input("URLs por requisição", min_value=1, max_value=100, value=DEFAULT_CHUNK_SIZE)
+        with col2:
+            max_in_flight = st.number_input("Requisições simultâneas", min_value=1, max_value=10, value=DEFAULT_MAX_IN_FLIGHT)
+        with col3:
+            retries = st.number_input("Tentativas extras por bloco", min_value=0, max_value=5, value=DEFAULT_RETRIES)
+        force_refresh = st.checkbox("Forçar atualização (ignorar resultados em cache)", key="batch_force_refresh")
+
+    job_id = st.session_state.batch_job_id
+    job = store.get_job(job_id) if job_id else None
+    if job and job['urls'] == st.session_state.unique_urls and not job['finished_at'] and job['done']:
+        st.info(f"Job `{job_id}` interrompido: {job['done']} de {job['total']} URLs já analisadas. Apenas as restantes serão enviadas.")
+
     if st.button("🚀 Iniciar Análise em Lote", type="primary", use_container_width=True):
-        urls_to_process = st.session_state.uploaded_urls
-        with st.spinner(f"Analisando {len(urls_to_process)} produtos... Isso pode levar vários minutos. 🤖"):
-            try:
-                payload = {"amazon_urls": urls_to_process}
-                response = requests.post(BATCH_ANALYZE_URL, json=payload, timeout=900)
-                response.raise_for_status()
-                st.session_state.batch_results = response.json().get('results', [])
-                st.success("Análise em lote concluída!")
-            except requests.exceptions.HTTPError as e:
-                st.error(f"Erro na API durante a análise em lote: {e.response.text}")
-            except requests.exceptions.RequestException as e:
-                st.error(f"Erro de conexão com o backend: {e}")
+        # URLs do mesmo produto (mesmo marketplace + ASIN) são analisadas uma única vez
+        urls_to_process = st.session_state.unique_urls
+        set_batch_results(None)
+        total = len(urls_to_process)
+
+        # Cada resultado é gravado no checkpoint assim que chega; só as URLs pendentes são enviadas.
+        # Forçar a atualização descarta também o que o job já tinha gravado.
+        job_id = store.start_job(urls_to_process, restart=force_refresh)
+        st.session_state.batch_job_id = job_id
+        st.query_params["job"] = job_id
+        pending = store.pending_positions(job_id, total)
+
+        # Produtos analisados recentemente (nesta ou em outra página) vêm do cache de resultados
+        if not force_refresh:
+            cache_hits = []
+            for position in pending:
+                cached = result_cache.get("analyze", urls_to_process[position])
+                if cached:
+                    cache_hits.append((position, cached))
+            if cache_hits:
+                hit_positions = [position for position, _ in cache_hits]
+                store.save_results(
+                    job_id, hit_positions,
+                    [urls_to_process[position] for position in hit_positions],
+                    [cached[0] for _, cached in cache_hits]
+                )
+                oldest = min(cached[1] for _, cached in cache_hits)
+                st.info(f"🗄️ {len(cache_hits)} produto(s) reaproveitados do cache de resultados (o mais antigo {format_age(oldest)}).")
+                count("result_cache.hits", len(cache_hits))
+                hit_set = set(hit_positions)
+                pending = [position for position in pending if position not in hit_set]
+
+        pending_urls = [urls_to_process[i] for i in pending]
+        pending_chunks = chunk_urls(pending, chunk_size)
+
+        done_urls = total - len(pending)
+        progress_bar = st.progress(done_urls / total, text=f"Analisando {len(pending)} de {total} produtos... Isso pode levar vários minutos. 🤖")
+        table_placeholder = st.empty()
+
+        failed_chunks = []
+        errors = {}
+        status_rows = []
+        with span("batch.submit", urls=len(pending_urls), chunk_size=chunk_size, in_flight=max_in_flight) as s:
+            for chunk in iter_batch_results(pending_urls, chunk_size, max_in_flight, retries):
+                done_urls += len(chunk.urls)
+                if chunk.results is None:
+                    failed_chunks.append(chunk)
+                    status_rows.extend({"URL": url, "ASIN": "", "Título": "", "Status": "❌ Falhou"} for url in chunk.urls)
+                else:
+                    # Resultados com erro não entram no checkpoint: ficam pendentes e são reenviados ao retomar
+                    done = [
+                        (position, url, result)
+                        for position, url, result in zip(pending_chunks[chunk.index], chunk.urls, chunk.results)
+                        if not result.get('error')
+                    ]
+                    if done:
+                        store.save_results(job_id, *map(list, zip(*done)))
+                    for position, url, result in zip(pending_chunks[chunk.index], chunk.urls, chunk.results):
+                        if result.get('error'):
+                            errors[position] = result
+                        else:
+                            result_cache.put("analyze", url, result)
+                        status_rows.append({
+                            "URL": url,
+                            "ASIN": result.get('asin', 'N/A'),
+                            "Título": result.get('product_title', ''),
+                            "Status": "❌ Falhou" if result.get('error') else "✅ Concluído",
+                        })
+                progress_bar.progress(done_urls / total, text=f"{done_urls} de {total} produtos processados...")
+                table_placeholder.dataframe(status_rows, use_container_width=True)
+            s.set(failed_chunks=len(failed_chunks))
+        count("batch.failed_chunks", len(failed_chunks))
+
+        set_batch_results(load_job_results(job_id, total, errors))
+        remaining = store.pending_positions(job_id, total)
+        if remaining:
+            if failed_chunks:
+                last_error = failed_chunks[-1].error
+            elif errors:
+                last_error = errors[max(errors)]['error']
+            else:
+                last_error = "resultado ausente na resposta da API"
+            st.warning(
+                f"Análise em lote concluída com {len(remaining)} URL(s) sem resultado. Último erro: {last_error}. "
+                "Clique novamente em Iniciar para reenviar apenas as pendentes."
+            )
+        else:
+            store.mark_finished(job_id)
+            st.success("Análise em lote concluída!")
 
 # --- Exibição do Relatório para Download ---
 if st.session_state.batch_results:
@@ -109,17 +292,76 @@ if st.session_state.batch_results:
     st.subheader("📊 Relatório Consolidado")
     
     # <<< ALTERAÇÃO: Mensagem de informação atualizada para Word (.docx)
-    st.info("A análise de todos os produtos foi concluída. Clique no botão abaixo para baixar o relatório consolidado em Word (.docx).")
+    st.info("A análise de todos os produtos foi concluída. Clique no botão abaixo para gerar e baixar o relatório consolidado em Word (.docx).")
     
-    # <<< ALTERAÇÃO: Lógica agora gera o relatório em Word (.docx)
-    docx_file = create_batch_docx_report(st.session_state.batch_results, st.session_state.uploaded_urls)
-    st.download_button(
-        label="📄 Baixar Relatório Consolidado em Word (.docx)",
-        data=docx_file,
-        file_name="relatorio_consolidado_analise.docx",
-        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        use_container_width=True
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        image_preset = st.selectbox(
+            "Qualidade das imagens no relatório",
+            list(IMAGE_PRESETS),
+            index=list(IMAGE_PRESETS).index(DEFAULT_PRESET),
+            key="batch_image_preset",
+            help="Presets menores geram arquivos bem mais leves em lotes grandes."
+        )
+    with col2:
+        volume_products = st.number_input(
+            "Produtos por arquivo", min_value=1, max_value=1000, value=BATCH_VOLUME_MAX_PRODUCTS,
+            key="batch_volume_products"
+        )
+    with col3:
+        volume_mb = st.number_input(
+            "Tamanho máximo por arquivo (MB)", min_value=1, max_value=500, value=BATCH_VOLUME_MAX_MB,
+            key="batch_volume_mb"
+        )
+    st.caption("Acima desses limites o relatório é dividido em vários arquivos .docx, entregues juntos em um .zip.")
+
+    # Os relatórios são gerados sob demanda em disco (memória constante) e memorizados pelo hash dos resultados
+    col_docx, col_pdf = st.columns(2)
+    with col_docx:
+        render_file_export(
+            "batch_docx",
+            lazy_builder("docx_generator", "create_batch_docx_export"),
+            (st.session_state.batch_results, st.session_state.batch_result_urls, image_preset, volume_products, volume_mb),
+            label="Relatório Consolidado em Word",
+            use_container_width=True
+        )
+    with col_pdf:
+        render_file_export(
+            "batch_pdf",
+            lazy_builder("pdf_generator", "create_batch_pdf_export"),
+            (st.session_state.batch_results, st.session_state.batch_result_urls, image_preset),
+            label="Relatório Consolidado em PDF",
+            use_container_width=True
+        )
+
+    # Cada linha do arquivo recebe o resultado do seu produto, mesmo quando repetido
+    results = st.session_state.batch_results
+    result_lines = st.session_state.batch_result_lines or []
+    if len(result_lines) > len(results):
+        st.caption(f"{len(result_lines)} linhas do arquivo correspondem a {len(results)} produtos únicos.")
+    with st.expander("📋 Resultado por linha do arquivo"):
+        lines = list(enumerate(result_lines))
+        # Só as linhas da página atual são montadas e enviadas ao navegador
+        st.dataframe([
+            {
+                "Linha": line + 1,
+                "URL": url,
+                "ASIN": results[index].get('asin', 'N/A'),
+                "Título": results[index].get('product_title', ''),
+            }
+            for line, (url, index) in paginate(lines, "file_lines")
+        ], use_container_width=True, hide_index=True)
+
+    st.divider()
+    st.subheader("🔍 Resultados por produto")
+    render_results_explorer(st.session_state.batch_results, st.session_state.batch_result_urls)
+    render_export(
+        "batch_json",
+        results_json,
+        (st.session_state.batch_results,),
+        label="Resultados em JSON",
+        file_name="resultados_analise.json",
+        mime="application/json"
     )
 
-    with st.expander("🔍 Ver resultados individuais da análise (JSON)"):
-        st.json(st.session_state.batch_results)
+render_perf_panel()
@@ -1 +1,237 @@
+# pdf_generator.py
+import copy
+import functools
+import io
+import os
+import tempfile
 
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+from fpdf.fonts import FontFace
+
+from image_fetcher import prefetch_images
+from image_processing import normalize_image, DEFAULT_PRESET
+from markdown_docx import parse_markdown
+from perf import span, count
+from report_settings import (
+    PDF_MIME, PREFETCH_WINDOW, PRODUCT_IMAGE_WIDTH_IN, LOGO_WIDTH_IN, LOGO_PATH, LOGO_AVAILABLE, TAGLINE,
+    product_url_for
+)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_PATH = os.path.join(BASE_DIR, 'DejaVuSans.ttf')
+FONT_FAMILY = 'DejaVu'
+
+MM_PER_INCH = 25.4
+LINE_HEIGHT = 6
+# A DejaVuSans do repositório só tem o peso regular: trechos em negrito usam a
+# Helvetica Bold padrão do PDF quando cabem em Latin-1 (o caso do português)
+BOLD_FAMILY = 'Helvetica'
+HEADING_COLOR = (31, 56, 100)
+TABLE_HEADER_FILL = (230, 230, 230)
+# Tamanho dos títulos do relatório, a partir do mais alto do texto
+HEADING_SIZES = (12, 11)
+LIST_INDENT_MM = 6
+
+
+@functools.lru_cache(maxsize=8)
+def _logo_bytes(image_preset: str):
+    """Logo já otimizado para o preset, lido do disco uma vez por processo (None se ausente)."""
+    if not LOGO_AVAILABLE:
+        return None
+    with open(LOGO_PATH, 'rb') as f:
+        return normalize_image(f.read(), LOGO_WIDTH_IN, image_preset)
+
+
+@functools.lru_cache(maxsize=1)
+def _pdf_template() -> FPDF:
+    """Documento vazio com a fonte já carregada: o TTF é lido uma vez por processo."""
+    pdf = FPDF(unit='mm', format='A4')
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_font(FONT_FAMILY, '', FONT_PATH)
+    pdf.set_font(FONT_FAMILY, size=11)
+    return pdf
+
+
+def _new_pdf() -> FPDF:
+    # Cada documento é uma cópia do modelo, que nunca é alterado
+    return copy.deepcopy(_pdf_template())
+
+
+def _set_font(pdf: FPDF, bold: bool, text: str, size: int = 11, italic: bool = False):
+    if bold or italic:
+        try:
+            text.encode('latin-1')
+            pdf.set_font(BOLD_FAMILY, ('B' if bold else '') + ('I' if italic else ''), size)
+            return
+        except UnicodeEncodeError:
+            pass
+    pdf.set_font(FONT_FAMILY, size=size)
+
+
+def _write(pdf: FPDF, text: str, bold: bool = False, link: str = "", italic: bool = False, size: int = 11):
+    _set_font(pdf, bold, text, size, italic)
+    pdf.write(LINE_HEIGHT, text, link)
+    if bold or italic or size != 11:
+        pdf.set_font(FONT_FAMILY, size=11)
+
+
+def _centered_line(pdf: FPDF, text: str, size: int = 11, heading: bool = False):
+    _set_font(pdf, heading, text, size)
+    if heading:
+        pdf.set_text_color(*HEADING_COLOR)
+    pdf.multi_cell(0, size * 0.5, text, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(FONT_FAMILY, size=11)
+    pdf.ln(2)
+
+
+def _write_runs(pdf: FPDF, runs, indent_mm: float = 0, size: int = 11):
+    """Escreve os trechos (texto, negrito, itálico) de `parse_markdown` e termina a linha."""
+    margin = pdf.l_margin
+    if indent_mm:
+        # As linhas seguintes do parágrafo quebram na mesma margem recuada
+        pdf.set_left_margin(margin + indent_mm)
+        pdf.set_x(margin + indent_mm)
+    for text, bold, italic in runs:
+        _write(pdf, text, bold=bold, italic=italic, size=size)
+    pdf.ln(LINE_HEIGHT)
+    if indent_mm:
+        pdf.set_left_margin(margin)
+        pdf.set_x(margin)
+
+
+def _draw_markdown_pdf(pdf: FPDF, text: str):
+    """
+    Desenha o Markdown do relatório a partir dos mesmos blocos usados no DOCX
+    (`parse_markdown`): títulos, parágrafos, listas com recuo e tabelas.
+    """
+    blocks = parse_markdown(text)
+    heading_levels = [block[1] for block in blocks if block[0] == 'heading']
+    top_level = min(heading_levels) if heading_levels else 1
+    for block in blocks:
+        kind = block[0]
+        if kind == 'heading':
+            size = HEADING_SIZES[min(block[1] - top_level, len(HEADING_SIZES) - 1)]
+            pdf.ln(2)
+            pdf.set_text_color(*HEADING_COLOR)
+            _write_runs(pdf, [(run_text, True, italic) for run_text, _, italic in block[2]], size=size)
+            pdf.set_text_color(0, 0, 0)
+        elif kind == 'paragraph':
+            _write_runs(pdf, block[1])
+            pdf.ln(2)
+        elif kind == 'bullet':
+            _write_runs(pdf, (('• ', False, False),) + block[2], indent_mm=LIST_INDENT_MM * (block[1] + 1))
+        elif kind == 'numbered':
+            _write_runs(pdf, block[2], indent_mm=LIST_INDENT_MM * (block[1] + 1))
+        elif kind == 'table':
+            # A DejaVuSans só tem o peso regular: o cabeçalho é destacado pelo fundo
+            with pdf.table(headings_style=FontFace(emphasis=None, fill_color=TABLE_HEADER_FILL)) as table:
+                columns = max(len(cells) for cells in block[1])
+                for cells in block[1]:
+                    row = table.row()
+                    for runs in cells + ((),) * (columns - len(cells)):
+                        row.cell(''.join(run[0] for run in runs))
+            pdf.ln(2)
+
+
+def _add_centered_image(pdf: FPDF, content: bytes, width_in: float, image_preset: str):
+    normalized = normalize_image(content, width_in, image_preset)
+    width_mm = width_in * MM_PER_INCH
+    pdf.image(io.BytesIO(normalized), x=(pdf.w - width_mm) / 2, w=width_mm)
+    return len(normalized)
+
+
+def _draw_header(pdf: FPDF, image_preset: str):
+    logo = _logo_bytes(image_preset)
+    if logo is not None:
+        _add_centered_image(pdf, logo, LOGO_WIDTH_IN, image_preset)
+    _centered_line(pdf, TAGLINE)
+
+
+def _draw_report_content_pdf(pdf: FPDF, info: dict, product_url: str, images: dict = None, image_preset: str = DEFAULT_PRESET):
+    """
+    Desenha o relatório de UM produto no PDF, com o mesmo conteúdo de
+    `_draw_report_content_docx`. Retorna o total de bytes de imagem embutidos.
+    """
+    embedded_bytes = 0
+    _centered_line(pdf, info.get('product_title', 'Título não encontrado'), size=16, heading=True)
+
+    _write(pdf, 'ASIN: ', bold=True)
+    _write(pdf, info.get('asin', 'N/A'))
+    pdf.ln(LINE_HEIGHT)
+    _write(pdf, 'Link do Produto: ', bold=True)
+    pdf.set_text_color(5, 99, 193)
+    _write(pdf, product_url, link=product_url if product_url.startswith('http') else "")
+    pdf.set_text_color(0, 0, 0)
+    pdf.ln(LINE_HEIGHT + 4)
+
+    _centered_line(pdf, "Relatório de Inconsistências e Melhorias", size=13, heading=True)
+    _draw_markdown_pdf(pdf, info.get('report', 'Nenhum relatório disponível.'))
+    pdf.ln(4)
+
+    _centered_line(pdf, "Imagens do Produto", size=13, heading=True)
+    image_urls = info.get('product_photos', [])
+    if not image_urls:
+        _centered_line(pdf, "Nenhuma imagem adicional encontrada.")
+    if images is None:
+        images = prefetch_images(image_urls)
+
+    for i, url in enumerate(image_urls):
+        try:
+            content = images.get(url)
+            if content is None:
+                raise ValueError(f"imagem indisponível: {url}")
+            embedded_bytes += _add_centered_image(pdf, content, PRODUCT_IMAGE_WIDTH_IN, image_preset)
+            _centered_line(pdf, f"Imagem {i+1}", size=9)
+        except Exception as e:
+            _centered_line(pdf, f"Erro ao carregar imagem {i+1}.")
+            print(f"Erro ao inserir imagem no PDF: {e}")
+            count("pdf.images_failed")
+    return embedded_bytes
+
+
+def create_single_pdf_report(info: dict, product_url: str, image_preset: str = DEFAULT_PRESET):
+    """Cria e retorna um PDF para um único relatório."""
+    pdf = _new_pdf()
+    pdf.add_page()
+    _draw_header(pdf, image_preset)
+    with span("pdf.assemble", products=1):
+        _draw_report_content_pdf(pdf, info, product_url, image_preset=image_preset)
+
+    pdf_io = io.BytesIO()
+    with span("pdf.save") as s:
+        pdf.output(pdf_io)
+        s.set(bytes=pdf_io.tell())
+    pdf_io.seek(0)
+    return pdf_io
+
+
+def create_batch_pdf_export(batch_results: list, urls, image_preset: str = DEFAULT_PRESET,
+                            output_dir: str = None, base_name: str = "relatorio_consolidado_analise"):
+    """
+    Cria o PDF consolidado (um produto por página) e grava direto em um arquivo.
+    Imagens repetidas são embutidas uma única vez. Retorna (caminho, nome do arquivo, mime).
+    """
+    output_dir = output_dir or tempfile.mkdtemp(prefix="globald_export_")
+    pdf = _new_pdf()
+    pdf.add_page()
+    _draw_header(pdf, image_preset)
+
+    images = {}
+    for i, result_info in enumerate(batch_results):
+        # Baixa as imagens da próxima janela de produtos de uma só vez
+        if i % PREFETCH_WINDOW == 0:
+            window = batch_results[i:i + PREFETCH_WINDOW]
+            images = prefetch_images(url for item in window for url in item.get('product_photos', []))
+        if i > 0:
+            pdf.add_page()
+        product_url = product_url_for(urls, i)
+        with span("pdf.assemble", products=1):
+            _draw_report_content_pdf(pdf, result_info, product_url, images, image_preset)
+
+    path = os.path.join(output_dir, f"{base_name}.pdf")
+    with span("pdf.save") as s:
+        pdf.output(path)
+        s.set(bytes=os.path.getsize(path))
+    return path, f"{base_name}.pdf", PDF_MIME
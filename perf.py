@@ -0,0 +1,152 @@
+# perf.py
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# Com GLOBALD_PERF=1 cada span é emitido como uma linha JSON no logger "globald.perf"
+LOG_ENABLED = os.environ.get('GLOBALD_PERF', '').lower() not in ('', '0', 'false', 'no')
+MAX_SPANS = 500
+
+logger = logging.getLogger('globald.perf')
+if LOG_ENABLED and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_recorder = contextvars.ContextVar('globald_perf_recorder', default=None)
+
+
+class PerfRecorder:
+    """Guarda os últimos spans e os contadores de uma sessão (para o painel de diagnóstico)."""
+
+    def __init__(self, max_spans: int = MAX_SPANS):
+        self.spans = deque(maxlen=max_spans)
+        self.counters = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, record: dict):
+        with self._lock:
+            self.spans.append(record)
+            entry = self._totals.setdefault(record['span'], {'span': record['span'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            entry['count'] += 1
+            entry['total_ms'] += record['ms']
+            entry['max_ms'] = max(entry['max_ms'], record['ms'])
+
+    def add(self, name: str, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> list:
+        """Agrega os spans por nome: quantidade, tempo total, médio e máximo (ms)."""
+        with self._lock:
+            totals = [dict(entry) for entry in self._totals.values()]
+        for entry in totals:
+            entry['mean_ms'] = round(entry['total_ms'] / entry['count'], 1)
+            entry['total_ms'] = round(entry['total_ms'], 1)
+        return sorted(totals, key=lambda e: e['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self._totals.clear()
+
+
+class _Span:
+    __slots__ = ('name', 'attrs', 'recorder', 'start')
+
+    def __init__(self, name: str, attrs: dict, recorder):
+        self.name = name
+        self.attrs = attrs
+        self.recorder = recorder
+
+    def set(self, **attrs):
+        """Adiciona atributos ao span (ex.: bytes baixados) antes de ele terminar."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {'span': self.name, 'ms': round((time.perf_counter() - self.start) * 1000, 2), **self.attrs}
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        if self.recorder is not None:
+            self.recorder.add_span(record)
+        if LOG_ENABLED:
+            logger.info(json.dumps(record, ensure_ascii=False, default=str))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """
+    Mede o tempo de um trecho: `with span("docx.save") as s: ... s.set(bytes=n)`.
+    Sem registro ativo na thread e sem GLOBALD_PERF, retorna um span vazio (custo desprezível).
+    """
+    recorder = _recorder.get()
+    if recorder is None and not LOG_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, attrs, recorder)
+
+
+def count(name: str, value=1):
+    """Incrementa um contador da sessão ativa (ex.: imagens com falha)."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.add(name, value)
+
+
+def bind(recorder):
+    """Define o registro de spans da thread atual (None desativa)."""
+    _recorder.set(recorder)
+
+
+def propagate(fn):
+    """
+    Envolve `fn` para que, executada em um pool de threads, registre os spans no
+    registro da thread que a enviou (as threads do pool não herdam o contexto).
+    """
+    recorder = _recorder.get()
+
+    def run(*args, **kwargs):
+        token = _recorder.set(recorder)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _recorder.reset(token)
+    return run
+
+
+def replay(spans: list, counters: dict):
+    """Registra na sessão ativa os spans e contadores coletados em outro processo."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return
+    for record in spans:
+        recorder.add_span(record)
+    for name, value in counters.items():
+        recorder.add(name, value)
@@ -0,0 +1,47 @@
+# perf_panel.py
+import streamlit as st
+
+from perf import PerfRecorder, bind
+from backend_client import get_backend_client
+from image_cache import get_image_cache
+
+
+def init_perf():
+    """Liga o registro de tempos desta sessão quando o painel de diagnóstico está ativo."""
+    if st.session_state.get('perf_panel_enabled'):
+        if '_perf_recorder' not in st.session_state:
+            st.session_state._perf_recorder = PerfRecorder()
+        bind(st.session_state._perf_recorder)
+    else:
+        bind(None)
+
+
+def render_perf_panel():
+    """Painel opcional na barra lateral com os tempos e contadores da sessão atual."""
+    with st.sidebar:
+        st.divider()
+        enabled = st.toggle("🩺 Diagnóstico de desempenho", key="perf_panel_enabled")
+        if not enabled:
+            return
+        recorder = st.session_state.get('_perf_recorder')
+        if recorder is None:
+            st.caption("Os tempos começam a ser registrados a partir da próxima interação.")
+            return
+        with st.expander("Tempos por etapa", expanded=True):
+            summary = recorder.summary()
+            if summary:
+                st.dataframe(summary, use_container_width=True, hide_index=True)
+            else:
+                st.caption("Nenhuma etapa registrada ainda.")
+            if recorder.counters:
+                st.json(recorder.counters)
+        with st.expander("Últimos eventos"):
+            st.dataframe(list(recorder.spans)[-50:][::-1], use_container_width=True, hide_index=True)
+        with st.expander("Backend e cache de imagens"):
+            image_cache = get_image_cache()
+            st.json({
+                'backend': get_backend_client().latency_stats(),
+                'image_cache': image_cache.stats() if image_cache else None,
+            })
+        if st.button("Limpar diagnóstico", key="perf_clear"):
+            recorder.clear()
@@ -0,0 +1,122 @@
+# report_export.py
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+
+import streamlit as st
+
+from report_settings import DOCX_MIME
+
+
+def payload_key(*parts) -> str:
+    """
+    Gera um hash do conteúdo de um relatório (resultados + URLs), calculado a cada
+    rerun: o pickle dos resultados é bem mais rápido que o JSON (cerca de 4 ms para
+    1000 produtos). Valores não serializáveis pelo pickle caem no JSON.
+    """
+    try:
+        raw = pickle.dumps(parts, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=20).hexdigest()
+
+
+def lazy_builder(module: str, name: str):
+    """
+    Função de exportação que só importa o gerador (python-docx, fpdf2) quando o
+    arquivo é de fato gerado, e não ao carregar a página.
+    """
+    def build(*args, **kwargs):
+        return getattr(importlib.import_module(module), name)(*args, **kwargs)
+    return build
+
+
+def render_export(name: str, build, args: tuple, label: str, file_name: str, mime: str = DOCX_MIME, **button_kwargs):
+    """
+    Exibe o botão de exportação de um relatório. O arquivo só é gerado quando o
+    usuário pede, e fica memorizado na sessão pelo hash do conteúdo: enquanto os
+    resultados não mudarem, o download é servido sem reconstruir o documento.
+    """
+    exports = st.session_state.setdefault('_report_exports', {})
+    key = payload_key(*args)
+    cached = exports.get(name)
+
+    if cached is None or cached[0] != key:
+        if st.button(f"⚙️ Preparar {label}", key=f"prepare_{name}", **button_kwargs):
+            with st.spinner("Gerando o relatório... 📝"):
+                data = build(*args).getvalue()
+            exports[name] = (key, data)
+            cached = exports[name]
+
+    if cached is not None and cached[0] == key:
+        st.download_button(
+            label=f"📄 Baixar {label}",
+            data=cached[1],
+            file_name=file_name,
+            mime=mime,
+            key=f"download_{name}",
+            **button_kwargs
+        )
+
+
+class _ExportFile:
+    """
+    Arquivo exportado, em uma pasta temporária só dele. A pasta é apagada quando o
+    arquivo é substituído por uma nova exportação, quando a sessão é descartada (o
+    estado da sessão deixa de referenciar o objeto) ou quando o servidor é encerrado.
+    """
+
+    def __init__(self, key: str, output_dir: str, path: str, file_name: str, mime: str):
+        self.key = key
+        self.path = path
+        self.file_name = file_name
+        self.mime = mime
+        self.remove = weakref.finalize(self, shutil.rmtree, output_dir, True)
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+def render_file_export(name: str, build, args: tuple, label: str, **button_kwargs):
+    """
+    Variante de `render_export` para exportações gravadas em disco: `build` recebe a
+    pasta de saída (`output_dir`) e retorna (caminho, nome do arquivo, mime). A sessão
+    guarda apenas o caminho, e o arquivo só é lido quando o usuário clica em baixar.
+    """
+    exports = st.session_state.setdefault('_report_file_exports', {})
+    key = payload_key(*args)
+    cached = exports.get(name)
+
+    if cached is None or cached.key != key or not os.path.exists(cached.path):
+        if st.button(f"⚙️ Preparar {label}", key=f"prepare_{name}", **button_kwargs):
+            output_dir = tempfile.mkdtemp(prefix="globald_export_")
+            built = False
+            try:
+                with st.spinner("Gerando o relatório... 📝"):
+                    path, file_name, mime = build(*args, output_dir=output_dir)
+                built = True
+            finally:
+                if not built:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+            if cached is not None:
+                cached.remove()
+            exports[name] = cached = _ExportFile(key, output_dir, path, file_name, mime)
+
+    if cached is not None and cached.key == key and os.path.exists(cached.path):
+        size = os.path.getsize(cached.path)
+        size_text = f"{size / (1024 * 1024):.1f} MB" if size >= 1024 * 1024 else f"{max(1, size // 1024)} KB"
+        st.download_button(
+            label=f"📄 Baixar {label} ({cached.file_name}, {size_text})",
+            # Lido apenas no clique, e não a cada rerun da página
+            data=cached.read,
+            file_name=cached.file_name,
+            mime=cached.mime,
+            key=f"download_{name}",
+            **button_kwargs
+        )
@@ -0,0 +1,35 @@
+# report_settings.py
+"""
+Constantes das exportações usadas tanto pelas páginas quanto pelos geradores.
+Fica em um módulo leve para que as páginas montem a interface sem importar
+python-docx ou fpdf2, que só são carregados quando um arquivo é gerado.
+"""
+import os
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+PDF_MIME = "application/pdf"
+ZIP_MIME = "application/zip"
+
+# Limites de cada volume da exportação em lote gravada em disco
+BATCH_VOLUME_MAX_PRODUCTS = 100
+BATCH_VOLUME_MAX_MB = 50
+
+# Quantidade de produtos cujas imagens são baixadas juntas no relatório em lote
+PREFETCH_WINDOW = 25
+
+# Largura de exibição das imagens no documento (define o tamanho em pixels após a otimização)
+PRODUCT_IMAGE_WIDTH_IN = 3.5
+LOGO_WIDTH_IN = 1.5
+# Caminho relativo ao módulo, e não ao diretório em que o Streamlit foi iniciado
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'globald_logo_512x512_original.jpg')
+# O logo é verificado uma única vez, na importação, e não a cada exportação
+LOGO_AVAILABLE = os.path.exists(LOGO_PATH)
+TAGLINE = 'AI Compliance Relatório by www.GlobalD.ai'
+
+
+def product_url_for(urls, i: int) -> str:
+    """
+    URL do i-ésimo produto do lote. `urls` é alinhada aos resultados: o ASIN não
+    identifica o produto (falhas têm ASIN 'N/A' e o mesmo ASIN pode vir de marketplaces diferentes).
+    """
+    return urls[i] if urls and i < len(urls) else "URL não encontrada"
@@ -0,0 +1,119 @@
+# result_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from url_utils import product_key
+
+# Tempo de validade dos resultados em cache (segundos) e banco opcional em disco.
+# Defina GLOBALD_RESULT_CACHE_DB como vazio para manter o cache apenas em memória.
+RESULT_CACHE_TTL = int(os.environ.get('GLOBALD_RESULT_CACHE_TTL', str(6 * 60 * 60)))
+RESULT_CACHE_DB = os.environ.get(
+    'GLOBALD_RESULT_CACHE_DB',
+    os.path.join(os.path.expanduser('~'), '.cache', 'globald', 'results.sqlite3')
+)
+MAX_MEMORY_ENTRIES = 5000
+
+
+class ResultCache:
+    """
+    Cache das respostas de /analyze e /optimize, compartilhado por todas as sessões
+    do processo. As entradas são indexadas por endpoint + marketplace/ASIN, ficam em
+    memória e, se `path` for informado, também em SQLite para sobreviver a reinícios.
+    """
+
+    def __init__(self, ttl: int = RESULT_CACHE_TTL, path: str = None):
+        self.ttl = ttl
+        # LRU: as entradas menos usadas saem da memória primeiro (o disco continua com elas)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+                )
+
+    @staticmethod
+    def _key(endpoint: str, url: str) -> str:
+        return f"{endpoint}:{product_key(url)}"
+
+    def _remember(self, key: str, entry: tuple):
+        # Chamado com o lock: grava na memória e descarta as menos usadas acima do limite
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > MAX_MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    def get(self, endpoint: str, url: str, ttl: int = None):
+        """Retorna (valor, momento em que foi gravado) ou None se ausente ou expirado."""
+        ttl = self.ttl if ttl is None else ttl
+        key = self._key(endpoint, url)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            if entry is None and self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, stored_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (json.loads(row[0]), row[1])
+                    self._remember(key, entry)
+        if entry is None or time.time() - entry[1] > ttl:
+            return None
+        return entry
+
+    def put(self, endpoint: str, url: str, value):
+        """Grava a resposta da API para o produto."""
+        key = self._key(endpoint, url)
+        stored_at = time.time()
+        with self._lock:
+            self._remember(key, (value, stored_at))
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO results (key, value, stored_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), stored_at)
+                    )
+
+    def invalidate(self, endpoint: str, url: str):
+        key = self._key(endpoint, url)
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+
+
+def format_age(stored_at: float) -> str:
+    """Descreve há quanto tempo um resultado foi gravado (ex.: 'há 3 min')."""
+    seconds = max(0, int(time.time() - stored_at))
+    if seconds < 60:
+        return f"há {seconds} s"
+    if seconds < 3600:
+        return f"há {seconds // 60} min"
+    return f"há {seconds // 3600} h {seconds % 3600 // 60} min"
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Retorna o cache de resultados compartilhado pelo processo."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = ResultCache(RESULT_CACHE_TTL, RESULT_CACHE_DB or None)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Cache de resultados em disco desativado: {e}")
+                _cache = ResultCache(RESULT_CACHE_TTL)
+        return _cache
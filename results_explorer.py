@@ -0,0 +1,168 @@
+# results_explorer.py
+import io
+import json
+import math
+
+import streamlit as st
+
+from markdown_docx import parse_markdown
+
+PAGE_SIZES = [25, 50, 100]
+STATUS_OPTIONS = ["Todos", "OK", "Falha"]
+# Rótulo exibido -> coluna do resumo usada na ordenação
+SORT_OPTIONS = {
+    "Ordem do arquivo": '#',
+    "Inconsistências": 'Inconsistências',
+    "Tamanho do relatório": 'Tamanho do relatório',
+    "Título": 'Título',
+    "ASIN": 'ASIN',
+    "Status": 'Status',
+}
+
+
+def count_issues(report: str) -> int:
+    """
+    Conta os itens de lista da seção de inconsistências do relatório (título com
+    "inconsist"); sem essa seção, conta os itens de lista do relatório inteiro.
+    """
+    section_level = None
+    found = False
+    section_items = 0
+    all_items = 0
+    for block in parse_markdown(report or ""):
+        if block[0] == 'heading':
+            text = ''.join(run[0] for run in block[2]).lower()
+            if 'inconsist' in text:
+                section_level, found = block[1], True
+            elif section_level is not None and block[1] <= section_level:
+                section_level = None
+        elif block[0] in ('bullet', 'numbered'):
+            all_items += 1
+            if section_level is not None:
+                section_items += 1
+    return section_items if found else all_items
+
+
+def summarize_results(results: list) -> list:
+    """Uma linha compacta por produto, sem o texto do relatório nem as imagens."""
+    rows = []
+    for position, result in enumerate(results):
+        report = result.get('report') or ''
+        failed = bool(result.get('error'))
+        rows.append({
+            '#': position + 1,
+            'ASIN': result.get('asin') or 'N/A',
+            'Título': result.get('product_title') or '',
+            'Status': "Falha" if failed else "OK",
+            'Inconsistências': 0 if failed else count_issues(report),
+            'Tamanho do relatório': len(report),
+            'Imagens': len(result.get('product_photos') or []),
+        })
+    return rows
+
+
+def filter_and_sort(rows: list, query: str = "", status: str = "Todos", sort_by: str = '#', descending: bool = False) -> list:
+    """Filtra por texto (ASIN ou título) e status e ordena pelo campo `sort_by`."""
+    query = query.strip().lower()
+    if query:
+        rows = [row for row in rows if query in row['ASIN'].lower() or query in row['Título'].lower()]
+    if status != "Todos":
+        rows = [row for row in rows if row['Status'] == status]
+    return sorted(rows, key=lambda row: row[sort_by], reverse=descending)
+
+
+def results_json(results: list) -> io.BytesIO:
+    """Todos os resultados em JSON, para download (gerado só sob demanda)."""
+    return io.BytesIO(json.dumps(results, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def paginate(rows: list, key: str) -> list:
+    """
+    Seletores de tamanho e número da página (estado em `{key}_page_size` e
+    `{key}_page`); retorna só as linhas da página atual, que é o que vai para o navegador.
+    """
+    col_size, col_page = st.columns(2)
+    with col_size:
+        page_size = st.selectbox("Por página", PAGE_SIZES, key=f"{key}_page_size")
+    total_pages = max(1, math.ceil(len(rows) / page_size))
+    # Um filtro mais restrito pode reduzir o número de páginas abaixo da página atual
+    if st.session_state.get(f"{key}_page", 1) > total_pages:
+        st.session_state[f"{key}_page"] = total_pages
+    with col_page:
+        page = st.number_input(f"Página (de {total_pages})", min_value=1, max_value=total_pages, step=1, key=f"{key}_page")
+    return rows[(page - 1) * page_size:page * page_size]
+
+
+def _cached_summary(results: list) -> list:
+    # O resumo é refeito apenas quando a lista de resultados da sessão é substituída
+    cached = st.session_state.get('_results_summary')
+    if cached is None or cached[0] is not results:
+        cached = (results, summarize_results(results))
+        st.session_state._results_summary = cached
+    return cached[1]
+
+
+def _render_details(result: dict, product_url: str = None):
+    st.subheader(result.get('product_title') or 'Título não encontrado')
+    st.markdown(f"**ASIN:** `{result.get('asin', 'N/A')}`" + (f" | [Link do Produto]({product_url})" if product_url else ""))
+    if result.get('error'):
+        st.error(f"Falha na análise: {result['error']}")
+    with st.expander("Ver Relatório de Análise", expanded=True):
+        st.markdown(result.get('report') or 'Nenhum relatório disponível.', unsafe_allow_html=True)
+
+    image_urls = result.get('product_photos') or []
+    if image_urls:
+        num_columns = 4
+        cols = st.columns(num_columns)
+        for i, url in enumerate(image_urls):
+            with cols[i % num_columns]:
+                st.image(url, caption=f"Imagem {i+1}", use_container_width=True)
+    else:
+        st.info("Nenhuma imagem de produto foi retornada pela API para exibição.")
+
+
+def render_results_explorer(results: list, urls: list = None):
+    """
+    Explorador dos resultados do lote: tabela resumida com filtro, ordenação e
+    paginação feitos no servidor. Só a página atual vai para o navegador, e o
+    relatório completo e as imagens só são exibidos para o produto selecionado.
+    """
+    rows = _cached_summary(results)
+    failed = sum(1 for row in rows if row['Status'] == "Falha")
+    st.caption(f"{len(rows)} produtos analisados · {failed} com falha")
+
+    col_query, col_status, col_sort, col_order = st.columns([3, 1, 2, 1])
+    with col_query:
+        query = st.text_input("Buscar por ASIN ou título", key="explorer_query")
+    with col_status:
+        status = st.selectbox("Status", STATUS_OPTIONS, key="explorer_status")
+    with col_sort:
+        sort_label = st.selectbox("Ordenar por", list(SORT_OPTIONS), key="explorer_sort")
+    with col_order:
+        descending = st.toggle("Decrescente", key="explorer_descending")
+
+    filtered = filter_and_sort(rows, query, status, SORT_OPTIONS[sort_label], descending)
+    page_rows = paginate(filtered, "explorer")
+
+    if not page_rows:
+        st.info("Nenhum produto corresponde aos filtros.")
+        return
+    event = st.dataframe(
+        page_rows,
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        # A seleção é da linha exibida: ao mudar filtro, ordem ou página, ela recomeça
+        key=f"explorer_table:{query}:{status}:{sort_label}:{descending}:"
+            f"{st.session_state.explorer_page_size}:{st.session_state.explorer_page}"
+    )
+    selected = event.selection.rows
+    if not selected or selected[0] >= len(page_rows):
+        st.caption("Selecione um produto na tabela para ver o relatório completo e as imagens.")
+        return
+
+    position = page_rows[selected[0]]['#'] - 1
+    product_url = urls[position] if urls and position < len(urls) else None
+    st.divider()
+    _render_details(results[position], product_url)
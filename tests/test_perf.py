@@ -0,0 +1,49 @@
+# tests/test_perf.py
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+from perf import PerfRecorder, bind, count, propagate, replay, span
+
+
+def _work(name):
+    with span(name):
+        count("work.calls")
+    return perf._recorder.get()
+
+
+def test_span_in_executor_is_recorded():
+    recorder = PerfRecorder()
+    bind(recorder)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            executor.submit(propagate(_work), "pool.submit").result()
+            list(executor.map(propagate(_work), ["pool.map", "pool.map"]))
+    finally:
+        bind(None)
+    names = sorted(record['span'] for record in recorder.spans)
+    assert names == ["pool.map", "pool.map", "pool.submit"]
+    assert recorder.counters == {"work.calls": 3}
+
+
+def test_propagate_does_not_leak_recorder_into_pool_threads():
+    recorder = PerfRecorder()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        bind(recorder)
+        try:
+            executor.submit(propagate(_work), "bound").result()
+        finally:
+            bind(None)
+        # A mesma thread do pool, em uma tarefa enviada sem sessão ativa
+        assert executor.submit(_work, "unbound").result() is None
+    assert [record['span'] for record in recorder.spans] == ["bound"]
+
+
+def test_replay_adds_records_from_another_process():
+    recorder = PerfRecorder()
+    bind(recorder)
+    try:
+        replay([{'span': "docx.section", 'ms': 1.5}], {"docx.images_failed": 2})
+    finally:
+        bind(None)
+    assert [record['span'] for record in recorder.spans] == ["docx.section"]
+    assert recorder.counters == {"docx.images_failed": 2}
@@ -0,0 +1,35 @@
+# tests/test_startup.py
+import importlib.util
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+CHECK_STARTUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'check_startup.py')
+
+
+def _load_check_startup():
+    spec = importlib.util.spec_from_file_location("check_startup", CHECK_STARTUP)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def startup():
+    check_startup = _load_check_startup()
+    # A medição roda em um interpretador novo, como no script
+    return check_startup, check_startup._run_child()
+
+
+def test_pages_do_not_load_heavy_modules(startup):
+    check_startup, report = startup
+    assert report['heavy_loaded_on_import'] == []
+    assert report['heavy_loaded_after_render'] == []
+    assert set(report['render_s']) == set(check_startup.PAGES)
+
+
+def test_app_import_within_budget(startup):
+    check_startup, report = startup
+    assert report['app_import_s'] <= check_startup.IMPORT_BUDGET_S
@@ -0,0 +1,97 @@
+# url_ingest.py
+import csv
+import io
+from collections import namedtuple
+
+from url_utils import parse_amazon_url, canonical_url
+
+# Quantidade de URLs exibidas na pré-visualização e de linhas inválidas detalhadas
+PREVIEW_LIMIT = 200
+INVALID_DETAIL_LIMIT = 100
+
+# `invalid_rows` traz (número da linha, conteúdo) das primeiras linhas rejeitadas
+IngestSummary = namedtuple('IngestSummary', ['urls', 'total_rows', 'invalid_count', 'invalid_rows', 'preview'])
+
+
+def _iter_text_rows(file_obj):
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        for line_number, line in enumerate(text, start=1):
+            yield line_number, line
+    finally:
+        text.detach()
+
+
+def _iter_csv_rows(file_obj):
+    text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        for line_number, row in enumerate(csv.reader(text), start=1):
+            yield line_number, row[0] if row else None
+    finally:
+        text.detach()
+
+
+def _iter_xlsx_rows(file_obj):
+    # Modo somente leitura: o openpyxl lê a planilha linha a linha, sem carregá-la inteira
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        for line_number, row in enumerate(sheet.iter_rows(min_col=1, max_col=1, values_only=True), start=1):
+            yield line_number, row[0] if row else None
+    finally:
+        workbook.close()
+
+
+def iter_upload_rows(file_obj, file_name: str):
+    """Percorre a primeira coluna do arquivo (.txt, .csv ou .xlsx), produzindo (linha, valor)."""
+    name = file_name.lower()
+    if name.endswith('.txt'):
+        return _iter_text_rows(file_obj)
+    if name.endswith('.csv'):
+        return _iter_csv_rows(file_obj)
+    if name.endswith('.xlsx'):
+        return _iter_xlsx_rows(file_obj)
+    raise ValueError(f"Formato de arquivo não suportado: {file_name}")
+
+
+def iter_validated_rows(rows):
+    """
+    Valida e canonicaliza (linha, valor) um a um, produzindo (linha, valor, URL
+    canônica), com None no lugar da URL quando o valor não é uma URL de produto
+    da Amazon. Linhas vazias são ignoradas.
+    """
+    for line_number, value in rows:
+        if value is None:
+            continue
+        value = str(value).strip()
+        if not value:
+            continue
+        parsed = parse_amazon_url(value)
+        yield line_number, value, canonical_url(*parsed) if parsed is not None else None
+
+
+def validate_rows(rows, preview_limit: int = PREVIEW_LIMIT) -> IngestSummary:
+    """
+    Valida e canonicaliza (linha, valor) à medida que são lidos. Linhas vazias são
+    ignoradas; linhas que não são URLs de produto da Amazon são contadas como
+    inválidas, com o número da linha.
+    """
+    urls = []
+    invalid_rows = []
+    invalid_count = 0
+    total_rows = 0
+    for line_number, value, url in iter_validated_rows(rows):
+        total_rows += 1
+        if url is None:
+            invalid_count += 1
+            if len(invalid_rows) < INVALID_DETAIL_LIMIT:
+                invalid_rows.append((line_number, value))
+            continue
+        urls.append(url)
+    return IngestSummary(urls, total_rows, invalid_count, invalid_rows, urls[:preview_limit])
+
+
+def ingest_urls(file_obj, file_name: str, preview_limit: int = PREVIEW_LIMIT) -> IngestSummary:
+    """Lê o arquivo enviado de forma incremental e retorna as URLs válidas já canonicalizadas."""
+    return validate_rows(iter_upload_rows(file_obj, file_name), preview_limit)
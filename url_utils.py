@@ -0,0 +1,91 @@
+# url_utils.py
+import re
+from urllib.parse import urlsplit, parse_qs
+
+# Formatos de caminho em que o ASIN aparece nas URLs da Amazon (/dp/, /gp/product/, /gp/aw/d/...)
+_ASIN_PATH_RE = re.compile(
+    r'/(?:dp(?:/product)?|gp/product|gp/aw/d|gp/offer-listing|exec/obidos/asin|exec/obidos/tg/detail/-|o/asin|d)'
+    r'/([A-Z0-9]{10})(?:[/?#]|$)',
+    re.IGNORECASE
+)
+_ASIN_RE = re.compile(r'^[A-Z0-9]{10}$', re.IGNORECASE)
+# Domínios dos marketplaces da Amazon; qualquer outro host é rejeitado (ex.: amazon.com.evil.com)
+AMAZON_MARKETPLACES = frozenset({
+    'amazon.com', 'amazon.com.br', 'amazon.ca', 'amazon.com.mx', 'amazon.co.uk', 'amazon.ie',
+    'amazon.de', 'amazon.fr', 'amazon.it', 'amazon.es', 'amazon.nl', 'amazon.se', 'amazon.pl',
+    'amazon.com.be', 'amazon.com.tr', 'amazon.ae', 'amazon.sa', 'amazon.eg', 'amazon.in',
+    'amazon.co.jp', 'amazon.sg', 'amazon.com.au', 'amazon.cn', 'amazon.co.za',
+})
+_AMAZON_HOST_RE = re.compile(r'^(?:[a-z0-9-]+\.)*?(amazon\.[a-z.]+)$')
+
+
+def sanitize_url(url):
+    """Remove espaços e garante o esquema https://. Retorna None para valores vazios."""
+    if not isinstance(url, str) or not url.strip(): return None
+    s_url = url.strip()
+    if not s_url.startswith(('http://', 'https://')):
+        s_url = 'https://' + s_url
+    return s_url
+
+
+def parse_amazon_url(url):
+    """
+    Extrai (marketplace, ASIN) de qualquer formato de URL de produto da Amazon,
+    ex.: ('amazon.com.br', 'B0XXXXXXXX'). Retorna None se não for possível identificar.
+    """
+    s_url = sanitize_url(url)
+    if s_url is None:
+        return None
+    parts = urlsplit(s_url)
+    host_match = _AMAZON_HOST_RE.match(parts.netloc.lower().split(':')[0])
+    if not host_match or host_match.group(1) not in AMAZON_MARKETPLACES:
+        return None
+    marketplace = host_match.group(1)
+
+    match = _ASIN_PATH_RE.search(parts.path)
+    if match:
+        return marketplace, match.group(1).upper()
+
+    # Alguns links trazem o ASIN apenas na query string (?asin=...)
+    for key, values in parse_qs(parts.query).items():
+        if key.lower() in ('asin', 'pd_rd_i') and values and _ASIN_RE.match(values[0]):
+            return marketplace, values[0].upper()
+    return None
+
+
+def canonical_url(marketplace: str, asin: str) -> str:
+    """Monta a URL canônica do produto: https://www.<marketplace>/dp/<ASIN>."""
+    return f"https://www.{marketplace}/dp/{asin}"
+
+
+def canonicalize_url(url):
+    """Retorna a URL canônica do produto, ou apenas a URL sanitizada se o ASIN não for encontrado."""
+    parsed = parse_amazon_url(url)
+    if parsed is None:
+        return sanitize_url(url)
+    return canonical_url(*parsed)
+
+
+def product_key(url) -> str:
+    """Chave que identifica o produto (marketplace/ASIN) para deduplicação."""
+    parsed = parse_amazon_url(url)
+    if parsed is None:
+        return sanitize_url(url)
+    return f"{parsed[0]}/{parsed[1]}"
+
+
+def dedupe_urls(urls: list):
+    """
+    Agrupa as URLs pelo produto. Retorna a lista de URLs canônicas únicas (na ordem
+    da primeira ocorrência) e, para cada URL original, o índice do produto único correspondente.
+    """
+    unique_urls = []
+    index_by_key = {}
+    row_index = []
+    for url in urls:
+        key = product_key(url)
+        if key not in index_by_key:
+            index_by_key[key] = len(unique_urls)
+            unique_urls.append(canonicalize_url(url))
+        row_index.append(index_by_key[key])
+    return unique_urls, row_index